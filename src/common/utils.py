@@ -2,6 +2,22 @@ import requests
 import warnings
 import os
 from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared HTTP session, so the connections to the data portal are kept alive and
+# reused across requests, retrying transient server errors
+session = requests.Session()
+session.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(
+            total=3, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504)
+        ),
+    ),
+)
 
 
 def get_soup(url: str) -> BeautifulSoup:
@@ -15,9 +31,10 @@ def get_soup(url: str) -> BeautifulSoup:
         BeautifulSoup: A BeautifulSoup object containing the parsed HTML content of the webpage.
     """
     warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
-    response = requests.get(url)
+    response = session.get(url)
 
-    return BeautifulSoup(response.text, "html.parser")
+    # Raw bytes so lxml detects the encoding itself
+    return BeautifulSoup(response.content, "lxml")
 
 
 def get_folder_path(period: str, data_path: str) -> str:
@@ -43,7 +60,8 @@ def get_folder_path(period: str, data_path: str) -> str:
 def get_full_paths(folder: str):
     """
     This function receives the folder path where the data is.
-    It returns a list with the full paths of the files in the folder.
+    It returns a sorted list with the full paths of the files in the folder,
+    skipping subfolders and hidden files.
 
     Parameters:
     folder (str): The path to the folder where the data is.
@@ -51,8 +69,32 @@ def get_full_paths(folder: str):
     Returns:
     list: A list with the full paths of the files in the folder.
     """
-    files = os.listdir(folder)
-    full_paths = [os.path.join(folder, file) for file in files]
-    full_paths.sort()
+    # scandir entries carry their type, so no extra stat call is needed per file
+    with os.scandir(folder) as it:
+        full_paths = sorted(
+            e.path for e in it if not e.name.startswith(".") and e.is_file()
+        )
 
     return full_paths
+
+
+def get_max_workers() -> int:
+    """
+    This function returns the number of worker processes to use for parallel parsing.
+    The SPPD_WORKERS environment variable takes precedence. Otherwise it uses the CPUs
+    this process is allowed to run on (which respects container/affinity limits),
+    leaving two of them free for the parent process and the system.
+
+    Returns:
+    int: The number of worker processes, at least 1.
+    """
+    workers = os.environ.get("SPPD_WORKERS")
+    if workers:
+        return max(int(workers), 1)
+
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+
+    return max(cpus - 2, 1)
@@ -129,7 +129,10 @@ def get_parquet_base_table(
             for f in os.listdir(parquet_path)
             if f.endswith(".parquet")
         ]
-        df = pl.concat([pl.read_parquet(f) for f in parquet_files], how="diagonal")
+        # One lazy plan over all the files, so they are read in parallel
+        df = pl.concat(
+            [pl.scan_parquet(f) for f in parquet_files], how="diagonal"
+        ).collect()
         print(f"Loaded {len(parquet_files)} parquet files from {parquet_path}")
         print(f"DataFrame shape: {df.shape}")
 
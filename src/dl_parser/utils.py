@@ -1,27 +1,75 @@
 # data processing
 import polars as pl
-from polars.exceptions import SchemaError
+import pyarrow as pa
+import pyarrow.ipc
 
 # web/xml scraping
-import requests
 import re
 import lxml.etree as ET
+import lxml.html
 
 # local file handling
 import zipfile
-import io
 import os
 import shutil
 from tqdm import tqdm
-import gc
 
 # Common utils
-from src.common.utils import get_soup, get_folder_path, get_full_paths
+from src.common.utils import (
+    get_folder_path,
+    get_full_paths,
+    get_max_workers,
+    session,
+)
 from src.dl_parser.mappings import mappings
 
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from functools import lru_cache
+import queue
+import tempfile
+import threading
 import time
 
+# Entry fields dropped from the parsed data
+_POP_COLS = ("summary", "ContractFolderStatus")
+
+atom_entry_tag = "{http://www.w3.org/2005/Atom}entry"
+
+# Period (year or year and month) in the name of a source zip file
+_PERIOD_RE = re.compile(r"_(\d{4,6})\.zip")
+
+# File in a period folder holding the ETag of its extracted zip
+_ETAG_FILE = ".etag"
+
+# Links to the zipped data on the source page
+_source_links_xpath = ET.XPath(
+    "//a[contains(@href, 'contratacion')"
+    " and substring(@href, string-length(@href) - 2) = 'zip']/@href"
+)
+
+# Cache of Clark notation tags ("{namespace}name") to their local names
+_LOCAL_NAMES = {}
+
+
+def local_name(tag: str) -> str:
+    """
+    Returns the local name of an XML tag, removing its namespace.
+
+    The feeds only use a few hundred distinct tags, so the names are cached instead
+    of splitting the tag string again for every element.
+
+    Args:
+        tag (str): The tag of the element, in Clark notation if it has a namespace.
+
+    Returns:
+        str: The tag without its namespace.
+    """
+    name = _LOCAL_NAMES.get(tag)
+    if name is None:
+        name = _LOCAL_NAMES[tag] = tag.rpartition("}")[2]
+    return name
+
 
 def extract_digits_from_url(url):
     """
@@ -33,16 +81,20 @@ def extract_digits_from_url(url):
     Returns:
         str: The period extracted from (or None if not found in) the URL.
     """
-    match = re.search(r"_(\d{4,6})\.zip", url)
+    match = _PERIOD_RE.search(url)
     if match:
         return match.group(1)
     return None
 
 
+@lru_cache(maxsize=1)
 def get_source_data(source_url: str):
     """
     Get the source data from the url and return a dict with the period as key and the link to the data as value.
 
+    The result is cached per URL, so the page is only fetched and parsed once per run.
+    The returned dict is shared between callers and should not be modified.
+
     Args:
         source_url (str): The URL of the webpage to fetch the source data from.
 
@@ -50,21 +102,21 @@ def get_source_data(source_url: str):
         dict: A dictionary with the period as key and the link to the data as value.
     """
 
-    soup = get_soup(source_url)
-    links = [
-        a.get("href")
-        for a in soup.find_all("a")
-        if "contratacion" in a.get("href") and a.get("href").endswith("zip")
-    ]
-    periods = [extract_digits_from_url(link) for link in links]
-    source_data = {p: l for p, l in zip(periods, links)}
+    # Only the zip links are needed, so filter the anchors inside lxml's XPath
+    # engine instead of walking a BeautifulSoup tree
+    response = session.get(source_url)
+    links = _source_links_xpath(lxml.html.fromstring(response.content))
+    source_data = {extract_digits_from_url(link): link for link in links}
 
     return source_data
 
 
 def recursive_field_dict(field, field_dict: dict):
     """
-    Recursively converts an ATOM element and its children into a nested dictionary.
+    Converts an ATOM element and its children into a nested dictionary.
+
+    The tree is walked with an explicit stack of (element, dictionary) pairs instead
+    of recursing, so deeply nested details don't cost one Python call per level.
 
     Args:
         field (lxml.etree.Element): The ATOM element to be converted.
@@ -73,27 +125,30 @@ def recursive_field_dict(field, field_dict: dict):
     Returns:
         None: The function modifies the field_dict in place to replicate the ATOM tree structure.
     """
-    for child in field:
-        tag = child.tag.split("}")[-1]
-        has_children = len(child) > 0
+    stack = [(field, field_dict)]
+    while stack:
+        parent, parent_dict = stack.pop()
+        for child in parent:
+            tag = local_name(child.tag)
+            has_children = len(child) > 0
 
-        if not has_children:
-            # Handle leaf elements (no children)
-            _add_to_dict(field_dict, tag, child.text)
-        else:
-            # Handle nested elements
-            if tag not in field_dict:
-                field_dict[tag] = {}
-                recursive_field_dict(child, field_dict[tag])
+            if not has_children:
+                # Handle leaf elements (no children)
+                _add_to_dict(parent_dict, tag, child.text)
             else:
-                # Convert to list if repeated
-                existing_value = field_dict[tag]
-                if not isinstance(existing_value, list):
-                    field_dict[tag] = [existing_value]
+                # Handle nested elements
+                if tag not in parent_dict:
+                    parent_dict[tag] = {}
+                    stack.append((child, parent_dict[tag]))
+                else:
+                    # Convert to list if repeated
+                    existing_value = parent_dict[tag]
+                    if not isinstance(existing_value, list):
+                        parent_dict[tag] = [existing_value]
 
-                new_dict = {}
-                recursive_field_dict(child, new_dict)
-                field_dict[tag].append(new_dict)
+                    new_dict = {}
+                    stack.append((child, new_dict))
+                    parent_dict[tag].append(new_dict)
 
 
 def _add_to_dict(d: dict, key: str, value: str):
@@ -131,18 +186,27 @@ def flatten_dict(d: dict, parent_key="", sep=".") -> dict:
         >>> flatten_dict(nested_dict)
         {'a.b.c': 1, 'd': 2}
     """
-    items = []
-    for k, v in d.items():
-        new_key = f"{parent_key}{sep}{k}" if parent_key else k
-
-        if isinstance(v, dict):
-            items.extend(flatten_dict(v, new_key, sep=sep).items())
-        elif isinstance(v, list):
-            items.extend(_flatten_list(v, new_key, sep))
-        elif v:  # Non-empty, non-dict, non-list values
-            items.append((new_key, v))
+    items = {}
+
+    # Walk nested dicts with an explicit stack of (key prefix, items iterator), so
+    # the keys keep their document order without one Python call per nested dict
+    stack = [(parent_key, iter(d.items()))]
+    while stack:
+        prefix, it = stack[-1]
+        for k, v in it:
+            new_key = f"{prefix}{sep}{k}" if prefix else k
+
+            if isinstance(v, dict):
+                stack.append((new_key, iter(v.items())))
+                break
+            elif isinstance(v, list):
+                items.update(_flatten_list(v, new_key, sep))
+            elif v:  # Non-empty, non-dict, non-list values
+                items[new_key] = v
+        else:
+            stack.pop()
 
-    return dict(items)
+    return items
 
 
 def _flatten_list(lst: list, key: str, sep: str) -> list:
@@ -187,10 +251,15 @@ def _flatten_dict_list(lst: list, key: str, sep: str) -> list:
         first_key = next(iter(first_dict))
         # Check if all dicts have the same key
         if all(len(item) == 1 and first_key in item for item in lst):
-            # All dicts have the same single key - concatenate values
-            values = [str(item[first_key]) for item in lst if item[first_key]]
-            if values:
-                return [(f"{key}{sep}{first_key}", "_".join(values))]
+            # All dicts have the same single key - concatenate values.
+            # ATOM leaves are already strings, so join them directly and only
+            # fall back to str() when a nested value shows up.
+            try:
+                joined = "_".join(v for item in lst if (v := item[first_key]))
+            except TypeError:
+                joined = "_".join(str(v) for item in lst if (v := item[first_key]))
+            if joined:
+                return [(f"{key}{sep}{first_key}", joined)]
             return []
 
     # Different keys or multiple keys - use numbered approach
@@ -201,62 +270,68 @@ def _flatten_dict_list(lst: list, key: str, sep: str) -> list:
     return items
 
 
-def get_atom_data(xml_file) -> tuple:
+def iter_atom_entries(path):
     """
-    Parses an ATOM file and retrieves namespace information and entries.
+    Stream the entries of an ATOM file, freeing each one once it has been consumed.
 
     Args:
-        xml_file (str): The path to the ATOM file to be parsed.
-
-    Returns:
-        tuple: A tuple containing:
-            - entries (list): A list of ATOM elements found under the 'entry' tag in the default namespace.
-            - atom (str): The default namespace URI enclosed in curly braces.
-    """
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
-
-    # Extract namespaces from root element attributes
-    ns = {}
-    for prefix, uri in root.nsmap.items() if hasattr(root, "nsmap") else []:
-        ns[prefix or ""] = uri
-
-    # Fallback to iterparse if nsmap not available
-    if not ns:
-        ns = {
-            node[0]: node[1] for _, node in ET.iterparse(xml_file, events=["start-ns"])
-        }
-
-    atom = "{" + ns.get("", "") + "}"
-    entries = root.findall(f"{atom}entry")
-
-    return entries, ns
+        path (str or file object): The file path to the ATOM file, or an open binary
+            file such as a member of a zip archive opened with ZipFile.open.
+
+    Yields:
+        lxml.etree.Element: Each 'entry' element of the feed.
+    """
+    context = ET.iterparse(
+        path,
+        events=("end",),
+        tag=atom_entry_tag,
+        collect_ids=False,
+        resolve_entities=False,
+        no_network=True,
+    )
+    for _, entry in context:
+        yield entry
+        # Free the processed entry and the already processed siblings
+        entry.clear()
+        while entry.getprevious() is not None:
+            del entry.getparent()[0]
 
 
-def get_data_list(entries: list, ns: dict) -> list:
+def get_data_list(entries, ns: dict = None) -> list:
     """
     Extracts the main information from the entries of the ATOM file and returns a list of dictionaries.
 
     Args:
-        entries (list): List of ATOM elements representing the entries.
-        ns (dict): Dictionary of namespaces used in the ATOM file.
+        entries (iterable): ATOM elements representing the entries (a list or a stream).
+        ns (dict, optional): Dictionary of namespaces used in the ATOM file. If not
+            given, the namespaces in scope of the first entry are used.
 
     Returns:
         list: A list of dictionaries, where each dictionary contains the extracted data for an entry.
     """
     data = []
 
+    # Resolve the details tag to Clark notation once instead of on every find
+    details_tag = None
+    if ns is not None:
+        details_tag = "{%s}ContractFolderStatus" % ns.get("cac-place-ext", "")
+
     for entry in entries:
+        if details_tag is None:
+            details_tag = "{%s}ContractFolderStatus" % entry.nsmap.get(
+                "cac-place-ext", ""
+            )
+
         # Initialize entry data
         entry_data = {}
 
         # Extract general information
         for field in entry:
-            tag = field.tag.split("}")[-1]
+            tag = local_name(field.tag)
             entry_data[tag] = field.text if tag != "link" else field.get("href")
 
         # Generate full details information
-        details = entry.find("cac-place-ext:ContractFolderStatus", ns)
+        details = entry.find(details_tag)
         details_dict = {}
         if details is not None:
             recursive_field_dict(details, details_dict)
@@ -264,27 +339,24 @@ def get_data_list(entries: list, ns: dict) -> list:
             entry_data.update(flat_details)
 
         # Pop columns that are no longer needed
-        pop_cols = ["summary", "ContractFolderStatus"]
-        for pop_col in pop_cols:
-            if pop_col in entry_data.keys():
-                entry_data.pop(pop_col)
+        for pop_col in _POP_COLS:
+            entry_data.pop(pop_col, None)
 
         data.append(entry_data)
 
     return data
 
 
-def download_and_extract_zip(
-    source_data: dict, period: str, data_path: str = "data/raw/atom"
-):
+def _download_zip(source_data: dict, period: str, data_path: str):
     """
-    This function receives a dictionary of source data per period and the selected period.
-    It downloads the documents inside a folder named after the period.
+    Downloads the zip file of a period to a temporary file.
 
-    Parameters:
-    source_data (dict): Dictionary with periods as keys and URLs as values.
-    period (int): The selected period for which the data needs to be downloaded.
-    data_path (str): The path to the data folder. Defaults to 'data/raw/atom'.
+    The ETag of the last extracted zip is sent along, so nothing is downloaded
+    when the server reports the zip has not changed.
+
+    Returns:
+    tuple: The period folder, the temporary file (positioned at the start) and the
+        new ETag, or None when the zip has not changed.
     """
     if period not in source_data.keys():
         raise ValueError(f"The period {period} is not available in the source data.")
@@ -293,115 +365,282 @@ def download_and_extract_zip(
     folder = get_folder_path(period, data_path)
     print(f"\nRequesting zip file from {period}...")
 
-    start_time = time.time()
-    response = requests.get(zip_url)
-    elapsed_time = time.time() - start_time
-    minutes, seconds = divmod(elapsed_time, 60)
-    print(f"Download took {int(minutes)} minutes and {int(seconds)} seconds.")
-    response.raise_for_status()  # Raise an error for bad status codes
-
-    # Use an in-memory buffer for the zip file
-    with io.BytesIO(response.content) as temp_file:
-        with zipfile.ZipFile(temp_file) as atomzip:
-            atom_files = atomzip.infolist()
-            total_size = sum(file.file_size for file in atom_files)
+    etag_path = os.path.join(folder, _ETAG_FILE)
+    headers = {}
+    if os.path.exists(etag_path):
+        with open(etag_path) as f:
+            headers["If-None-Match"] = f.read()
 
-            with tqdm(
+    # Stream the zip file to a temporary file on disk instead of holding the whole
+    # response in memory (a SpooledTemporaryFile is not seekable for ZipFile on 3.10)
+    temp_file = tempfile.TemporaryFile()
+    try:
+        with session.get(zip_url, stream=True, headers=headers) as response:
+            if response.status_code == 304:
+                print(f"The zip file from {period} has not changed, skipping download.")
+                temp_file.close()
+                return None
+
+            response.raise_for_status()  # Raise an error for bad status codes
+            etag = response.headers.get("ETag")
+
+            # The previous ETag no longer matches the files once extraction starts
+            if os.path.exists(etag_path):
+                os.remove(etag_path)
+
+            start_time = time.time()
+            for chunk in response.iter_content(chunk_size=1 << 20):
+                temp_file.write(chunk)
+            elapsed_time = time.time() - start_time
+            minutes, seconds = divmod(elapsed_time, 60)
+            print(f"Download took {int(minutes)} minutes and {int(seconds)} seconds.")
+    except BaseException:
+        temp_file.close()
+        raise
+
+    temp_file.seek(0)
+    return folder, temp_file, etag
+
+
+def _extract_zip(folder: str, temp_file, etag: str = None):
+    """
+    Extracts a downloaded zip file into the period folder and closes it.
+    The ETag is saved next to the files once they are all extracted.
+    """
+    with temp_file, zipfile.ZipFile(temp_file) as atomzip:
+        atom_files = [f for f in atomzip.infolist() if not f.is_dir()]
+        total_size = sum(file.file_size for file in atom_files)
+
+        # ZipFile creates missing folders with a non-atomic exists/makedirs
+        # check, so nested folders are created here before the threads start
+        # (names that ZipFile itself would sanitise are left to it)
+        subfolders = {os.path.dirname(f.filename) for f in atomzip.infolist()}
+        for subfolder in subfolders:
+            if subfolder and not os.path.isabs(subfolder) and ".." not in subfolder:
+                os.makedirs(os.path.join(folder, subfolder), exist_ok=True)
+
+        def extract(file):
+            atomzip.extract(member=file, path=folder)
+            return file.file_size
+
+        # Decompression releases the GIL and ZipFile serialises the reads of
+        # the shared file, so the members can be extracted by several threads
+        with (
+            tqdm(
                 total=total_size, desc="Extracting", unit="B", unit_scale=True
-            ) as pbar:
-                for file in atom_files:
-                    atomzip.extract(member=file, path=folder)
-                    pbar.update(file.file_size)
-
-    # Explicitly delete the response and buffer to free memory
-    del response
-    del temp_file
+            ) as pbar,
+            ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as pool,
+        ):
+            for file_size in pool.map(extract, atom_files):
+                pbar.update(file_size)
 
-    # Run garbage collection to free memory
-    gc.collect()
+    if etag:
+        with open(os.path.join(folder, _ETAG_FILE), "w") as f:
+            f.write(etag)
 
-    files_in_folder = len(os.listdir(folder))
+    files_in_folder = len([f for f in os.listdir(folder) if f != _ETAG_FILE])
     print(f"{files_in_folder} ATOM files were downloaded.")
 
 
-def _process_single_file(path):
-    """Helper function to process a single ATOM file."""
+def download_and_extract_zip(
+    source_data: dict, period: str, data_path: str = "data/raw/atom"
+):
+    """
+    This function receives a dictionary of source data per period and the selected period.
+    It downloads the documents inside a folder named after the period.
+
+    The ETag of the extracted zip is kept in the folder, so the download and the
+    extraction are skipped when the server reports the zip has not changed.
+
+    Parameters:
+    source_data (dict): Dictionary with periods as keys and URLs as values.
+    period (int): The selected period for which the data needs to be downloaded.
+    data_path (str): The path to the data folder. Defaults to 'data/raw/atom'.
+    """
+    downloaded = _download_zip(source_data, period, data_path)
+    if downloaded is not None:
+        _extract_zip(*downloaded)
+
+
+def download_and_extract_many(
+    source_data: dict, periods: list, data_path: str = "data/raw/atom"
+):
+    """
+    Downloads and extracts the zip files of several periods, in order.
+
+    A single background thread downloads the zip files while the calling thread
+    extracts them, so the next period is downloaded (network bound) while the
+    current one is extracted (CPU and disk bound). The queue holds at most one
+    finished download, so no more than two zip files are on disk at a time.
+
+    Parameters:
+    source_data (dict): Dictionary with periods as keys and URLs as values.
+    periods (list): The periods to download.
+    data_path (str): The path to the data folder. Defaults to 'data/raw/atom'.
+    """
+    downloads = queue.Queue(maxsize=1)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        # Give up once the consumer has stopped, instead of blocking forever
+        while not stop.is_set():
+            try:
+                downloads.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def producer():
+        for period in periods:
+            try:
+                downloaded = _download_zip(source_data, period, data_path)
+            except Exception as e:
+                put(e)
+                return
+            if downloaded is not None and not put(downloaded):
+                downloaded[1].close()
+                return
+        put(None)
+
+    downloader = threading.Thread(target=producer, daemon=True)
+    downloader.start()
+    try:
+        while (item := downloads.get()) is not None:
+            # Surface any download error
+            if isinstance(item, Exception):
+                raise item
+            _extract_zip(*item)
+    finally:
+        stop.set()
+        downloader.join()
+        # Close a download left behind by an extraction error
+        while not downloads.empty():
+            item = downloads.get()
+            if isinstance(item, tuple):
+                item[1].close()
+
+
+def _process_single_file(path, shard_dir):
+    """
+    Helper function to process a single ATOM file.
+
+    The entries are streamed with iterparse, so the whole tree is never held in
+    memory. The parsed entries are written by the worker itself as an Arrow IPC
+    shard in shard_dir, so the columns are built in parallel and only the record
+    count travels back to the parent process. Every field is text, so the columns
+    are typed as strings (also those that are always empty in this file).
+
+    The shard is built with pyarrow rather than Polars: the workers are forked from
+    a parent that already runs Polars, and the Polars thread pool is not fork-safe.
+    """
     try:
-        entries, ns = get_atom_data(path)
-        data_list = get_data_list(entries, ns)
-        return data_list if len(data_list) > 0 else None
+        data_list = get_data_list(iter_atom_entries(path))
+        if len(data_list) == 0:
+            return None
+
+        # Entries can have different fields, so the columns are the union of keys
+        columns = {}
+        for d in data_list:
+            columns.update(dict.fromkeys(d))
+        table = pa.table(
+            {c: pa.array([d.get(c) for d in data_list], pa.string()) for c in columns}
+        )
+
+        shard_file = os.path.join(shard_dir, f"{os.path.basename(path)}.arrow")
+        with pa.ipc.new_file(shard_file, table.schema) as writer:
+            writer.write_table(table)
+        return len(data_list)
     except Exception:
         return None
 
 
-def _process_batch(paths_batch, batch_num, tmp_dir):
-    """Helper function to process a batch of paths and save to parquet."""
-    results = []
+def _process_batch(paths_batch, batch_num, tmp_dir, executor):
+    """
+    Helper function to process a batch of paths into a single Arrow IPC shard.
+
+    The per-file shards written by the workers are combined into one shard per
+    batch, so the combine step scans a few large files instead of one per ATOM file.
+    """
+    total_records = 0
     failed_paths = []
-    max_workers = max((os.cpu_count()) - 2, 1)
+    file_shards = []
 
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
-        results_iter = executor.map(_process_single_file, paths_batch)
+    results_iter = executor.map(
+        _process_single_file, paths_batch, repeat(tmp_dir, len(paths_batch))
+    )
 
-        for path, result in zip(paths_batch, results_iter):
-            if result is not None:
-                results.extend(result)
-            else:
-                failed_paths.append(path)
+    for path, result in zip(paths_batch, results_iter):
+        if result is not None:
+            total_records += result
+            file_shards.append(os.path.join(tmp_dir, f"{os.path.basename(path)}.arrow"))
+        else:
+            failed_paths.append(path)
 
     if failed_paths:
         print(f"Failed to process {len(failed_paths)} files in batch {batch_num}")
 
-    if results:
-        df = pl.DataFrame(results)
-        batch_file = os.path.join(tmp_dir, f"batch_{batch_num}.parquet")
-        df.write_parquet(batch_file, compression="snappy")
-        return len(results)
-    return 0
+    # Files can have different fields, so their columns are aligned by name
+    if file_shards:
+        batch_shard = os.path.join(tmp_dir, f"batch_{batch_num}.arrow")
+        pl.concat(
+            [pl.scan_ipc(f, memory_map=False) for f in file_shards], how="diagonal"
+        ).sink_ipc(batch_shard)
+        for shard_file in file_shards:
+            os.unlink(shard_file)
+
+    return total_records
 
 
-def get_concat_df(paths: list, raw_data_path: str) -> pl.DataFrame:
+def get_concat_df(paths: list, raw_data_path: str, tmp_dir: str = None) -> pl.DataFrame:
     """
-    Process files in batches of 100, saving intermediate results as parquet files.
+    Process files in batches of 100, saving intermediate results as Arrow IPC shards.
 
     Parameters:
     paths (list): A list with the full paths to the files with the data.
+    raw_data_path (str): The path to the raw data folder.
+    tmp_dir (str): Temporary folder for the shards, shared across periods.
+        Defaults to a 'tmp' folder inside raw_data_path, removed once done.
 
     Returns:
     pl.DataFrame: A polars DataFrame with the data from all the files.
     """
-    # Create temporary directory
-    tmp_dir = os.path.join(raw_data_path, "tmp")
+    # Create temporary directory unless a shared one is provided
+    owns_tmp_dir = tmp_dir is None
+    if owns_tmp_dir:
+        tmp_dir = os.path.join(raw_data_path, "tmp")
     os.makedirs(tmp_dir, exist_ok=True)
 
     # Process in batches of 100
     batch_size = 100
     total_records = 0
 
-    for i in tqdm(
-        range(0, len(paths), batch_size), desc="Processing batches", unit="batch"
-    ):
-        batch_paths = paths[i : i + batch_size]  # noqa: E203
-        records = _process_batch(batch_paths, i // batch_size, tmp_dir)
-        total_records += records
+    # One pool of workers for all the batches instead of starting one per batch
+    with ProcessPoolExecutor(max_workers=get_max_workers()) as executor:
+        for i in tqdm(
+            range(0, len(paths), batch_size), desc="Processing batches", unit="batch"
+        ):
+            batch_paths = paths[i : i + batch_size]  # noqa: E203
+            records = _process_batch(batch_paths, i // batch_size, tmp_dir, executor)
+            total_records += records
 
     if total_records == 0:
         raise ValueError("No files were successfully processed")
 
-    # Read all parquet files and combine
+    # Read all shards and combine, aligning the columns of the different batches
     print("Combining all batches...")
-    parquet_files = [
-        os.path.join(tmp_dir, f) for f in os.listdir(tmp_dir) if f.endswith(".parquet")
-    ]
+    with os.scandir(tmp_dir) as it:
+        shard_files = [e.path for e in it if e.name.endswith(".arrow")]
 
     final_df = pl.concat(
-        [pl.scan_parquet(f) for f in parquet_files], how="diagonal"
+        [pl.scan_ipc(f, memory_map=False) for f in shard_files], how="diagonal"
     ).collect()
 
     # Cleanup temporary files
-    for f in parquet_files:
-        os.remove(f)
-    os.rmdir(tmp_dir)
+    for f in shard_files:
+        os.unlink(f)
+    if owns_tmp_dir:
+        os.rmdir(tmp_dir)
 
     return final_df
 
@@ -411,6 +650,7 @@ def get_full_parquet(
     dup_strategy: str = "link",
     apply_mapping: str = "N",
     raw_data_path: str = "data/raw",
+    tmp_dir: str = None,
 ) -> str:
     """
     Generates a full parquet file for the given period by processing and consolidating data.
@@ -428,6 +668,8 @@ def get_full_parquet(
         dup_strategy (str): The strategy to use for removing duplicates: 'link', 'title', or 'None'.
         apply_mapping (str): Whether to apply column mappings ('Y' for yes, 'N' for no).
         data_path (str): The path to the data folder. Defaults to 'data/raw'.
+        tmp_dir (str): Temporary folder for the batch files, shared across periods.
+            Defaults to None (a 'tmp' folder inside raw_data_path).
 
     Returns:
         str: The path to the generated parquet file.
@@ -442,15 +684,20 @@ def get_full_parquet(
     # Get the source data
     folder = get_folder_path(f"atom/{period}", raw_data_path)
     full_paths = get_full_paths(folder)
-    dfs = get_concat_df(full_paths, raw_data_path)
+    dfs = get_concat_df(full_paths, raw_data_path, tmp_dir=tmp_dir)
 
     dfs = remove_duplicates(dfs, dup_strategy)
 
     if apply_mapping == "Y":
         dfs = apply_mappings(dfs, mappings)
 
-    # Save to parquet
-    dfs.write_parquet(parquet_file, compression="snappy")
+    # Save to parquet; ZSTD and large row groups keep the file small and fast to scan
+    dfs.write_parquet(
+        parquet_file,
+        compression="zstd",
+        compression_level=3,
+        row_group_size=262144,
+    )
 
     print(
         f"Parsed and created parquet file for {period} with {len(dfs)} rows and {dfs.shape[1]} columns."
@@ -482,8 +729,8 @@ def remove_duplicates(df: pl.DataFrame, strategy: str) -> pl.DataFrame:
             f"Invalid strategy: {strategy}. Allowed strategies are {strategies}"
         )
 
-    # Convert 'updated' column to datetime if possible (in case already transformed to datetime)
-    try:
+    # Convert 'updated' column to datetime unless it already is one
+    if df.schema.get("updated") == pl.Utf8:
         df = df.with_columns(
             pl.col("updated").str.strptime(
                 pl.Datetime,
@@ -491,13 +738,14 @@ def remove_duplicates(df: pl.DataFrame, strategy: str) -> pl.DataFrame:
                 strict=False
             )
         )
-    # Exception for updated column being already a datetime
-    except SchemaError:
-        pass
 
-    # Sort and drop duplicates
-    no_dups_df = df.sort("updated", descending=True).unique(
-        subset=[strategy], keep="first"
+    # Keep the most recent row per key by picking the position of its newest
+    # 'updated' (a linear scan per group, no sorting), then restore the column order.
+    # Groups without any date keep their first row.
+    no_dups_df = (
+        df.group_by(strategy, maintain_order=False)
+        .agg(pl.all().get(pl.col("updated").arg_max().fill_null(0)))
+        .select(df.columns)
     )
 
     dups_dropped = len(df) - len(no_dups_df)
@@ -517,8 +765,10 @@ def apply_mappings(df: pl.DataFrame, mappings: dict) -> pl.DataFrame:
     Returns:
     pl.DataFrame: The DataFrame with the mappings applied.
     """
-    selected_columns = {k: v for k, v in mappings.items() if k in df.columns}
-    mapped_df = df.select([pl.col(k).alias(v) for k, v in selected_columns.items()])
+    columns = set(df.columns)
+    mapped_df = df.select(
+        [pl.col(k).alias(v) for k, v in mappings.items() if k in columns]
+    )
     return mapped_df
 
 
@@ -534,9 +784,11 @@ def delete_files(period: str, data_path: str = "data/raw/atom"):
     None
     """
 
-    folder = get_folder_path(period, data_path)
-    files_in_folder = len(os.listdir(folder))
+    # get_folder_path would create the folder, so the path is only joined here
+    folder = os.path.join(data_path, period)
     if os.path.exists(folder):
+        files_in_folder = len(os.listdir(folder))
+        # Remove the whole tree in one call instead of a Python loop per file
         shutil.rmtree(folder)
         print(f"{files_in_folder} ATOM files were deleted.")
     else:
@@ -559,17 +811,22 @@ def dl_parser(
     del_files (str): Whether to delete the downloaded files after processing.
     """
 
-    for selected_period in selected_periods:
-        download_and_extract_zip(source_data, selected_period)
+    download_and_extract_many(source_data, selected_periods)
 
+    # One temporary folder for the batch files of every period
+    tmp_dir = tempfile.mkdtemp(prefix="sppd_")
     parquet_files = []
-    for selected_period in selected_periods:
-        parquet_file = get_full_parquet(
-            period=selected_period,
-            dup_strategy=dup_strategy,
-            apply_mapping=apply_mapping,
-        )
-        parquet_files.append(parquet_file)
+    try:
+        for selected_period in selected_periods:
+            parquet_file = get_full_parquet(
+                period=selected_period,
+                dup_strategy=dup_strategy,
+                apply_mapping=apply_mapping,
+                tmp_dir=tmp_dir,
+            )
+            parquet_files.append(parquet_file)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
 
     if del_files == "Y":
         for selected_period in selected_periods:
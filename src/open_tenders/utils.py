@@ -1,19 +1,24 @@
 from src.dl_parser.utils import (
     get_source_data,
-    download_and_extract_zip,
+    download_and_extract_many,
     get_folder_path,
-    get_full_paths,
-    get_atom_data,
-    remove_duplicates,
     delete_files,
-    recursive_field_dict,
-    flatten_dict,
+    local_name,
+    iter_atom_entries,
 )
+from src.common.utils import get_max_workers
 import polars as pl
-from concurrent.futures import ProcessPoolExecutor
+import pyarrow.parquet as pq
+import lxml.etree as ET
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from collections import deque
+from functools import lru_cache
 from tqdm import tqdm
 import os
+from pathlib import Path
 import json
+import orjson
 from datetime import datetime, date
 
 """
@@ -67,6 +72,99 @@ open_tenders_cols = {
     "TenderingProcess.TenderSubmissionDeadlinePeriod.EndDate": "ProcessEndDate",
 }
 
+# Schema of the extracted open tenders records (general entry fields + columns)
+open_tenders_schema = {
+    "link": pl.Utf8,
+    "title": pl.Utf8,
+    "updated": pl.Utf8,
+    **{col: pl.Utf8 for col in open_tenders_cols.values()},
+    "EstimatedAmount": pl.Float64,
+}
+
+# Monetary amounts, extracted as text and cast to float once per file
+amount_cols = [col for col, dtype in open_tenders_schema.items() if dtype == pl.Float64]
+
+# Entry fields that are not kept in the open tenders data
+dropped_entry_fields = {"id", "summary", "ContractFolderStatus"}
+
+# Most recent version of each tender in a group_by("link") (first row if undated)
+latest_version = pl.all().get(pl.col("updated").arg_max().fill_null(0))
+
+
+def _local_name_xpath(path: str) -> ET.XPath:
+    """
+    Compile a dotted path of local tag names (as produced by flatten_dict) into an
+    XPath returning the text of the matching elements, regardless of namespaces.
+    """
+    steps = "/".join(f"*[local-name()='{step}']" for step in path.split("."))
+    return ET.XPath(f"{steps}/text()")
+
+
+# Compiled once per process: details lookup and status
+details_xpath = ET.XPath("*[local-name()='ContractFolderStatus']")
+status_xpath = _local_name_xpath("ContractFolderStatusCode")
+end_date_xpath = _local_name_xpath(
+    "TenderingProcess.TenderSubmissionDeadlinePeriod.EndDate"
+)
+
+# Dotted paths of the open tenders columns and all of their prefixes, used to only
+# walk the subtrees of the details that can contain one of the columns
+open_tenders_path_prefixes = {
+    ".".join(steps[:i])
+    for steps in map(lambda k: k.split("."), open_tenders_cols)
+    for i in range(1, len(steps) + 1)
+}
+
+
+def collect_open_tenders_fields(element, fields: dict, prefix: str = "") -> None:
+    """
+    Walks the details of an entry collecting the texts of the open tenders columns.
+
+    Only children whose dotted path (as produced by flatten_dict) is a prefix of one
+    of the open_tenders_cols keys are visited, so the rest of the tree is skipped.
+    The walk is breadth-first over an explicit queue, so repeated elements are
+    collected in document order without one Python frame per nested element.
+
+    Args:
+        element (lxml.etree.Element): The element whose children should be walked.
+        fields (dict): The dictionary where the texts are collected, by dotted path.
+        prefix (str, optional): The dotted path of the element, with a trailing dot.
+
+    Returns:
+        None: The function modifies fields in place, appending the texts of every
+              matching element to the list of its path.
+    """
+    queue = deque([(element, prefix)])
+    while queue:
+        parent, parent_prefix = queue.popleft()
+        for child in parent.iterchildren(ET.Element):
+            path = parent_prefix + local_name(child.tag)
+            if path not in open_tenders_path_prefixes:
+                continue
+            if path in open_tenders_cols:
+                if child.text is not None:
+                    fields.setdefault(path, []).append(child.text)
+            else:
+                queue.append((child, path + "."))
+
+
+def get_recent_months(source_dict: dict, n_months: int = 3) -> list:
+    """
+    Returns the most recent monthly periods of the source data.
+
+    Monthly periods are YYYYMM codes (yearly ones only have 4 digits), so sorting the
+    codes as strings also sorts them by date, across years.
+
+    Args:
+        source_dict (dict): The source data, keyed by period code.
+        n_months (int, optional): The number of months to return. Defaults to 3.
+
+    Returns:
+        list: The period codes of the most recent months, newest first.
+    """
+    months = [k for k in source_dict if len(k) > 4]
+    return sorted(months, reverse=True)[:n_months]
+
 
 def get_recent_data_json(source_url: str) -> str:
     """
@@ -89,16 +187,10 @@ def get_recent_data_json(source_url: str) -> str:
     """
     source_dict = get_source_data(source_url)
 
+    recent_months = get_recent_months(source_dict)
     source_dict_recent = {
-        k: {"filename": v.split("/")[-1], "link": v}
-        for k, v in source_dict.items()
-        if len(k) > 4
-        and k
-        in sorted(
-            [k for k in source_dict.keys() if len(k) > 4],
-            key=lambda x: int(x[-2:]),
-            reverse=True,
-        )[:3]
+        k: {"filename": source_dict[k].split("/")[-1], "link": source_dict[k]}
+        for k in recent_months
     }
 
     # Convert source_dict_recent to JSON
@@ -128,157 +220,201 @@ def download_recent_data(source_url: str, data_path: str):
     """
     source_dict = get_source_data(source_url)
 
-    source_dict_recent = {
-        k: v
-        for k, v in source_dict.items()
-        if len(k) > 4
-        and k
-        in sorted(
-            [k for k in source_dict.keys() if len(k) > 4],
-            key=lambda x: int(x[-2:]),
-            reverse=True,
-        )[:3]
-    }
-
-    last_months = source_dict_recent.keys()
+    last_months = get_recent_months(source_dict)
+    source_dict_recent = {k: source_dict[k] for k in last_months}
 
-    for month in last_months:
-        download_and_extract_zip(
-            source_data=source_dict_recent, period=month, data_path=f"{data_path}/raw"
-        )
+    download_and_extract_many(
+        source_data=source_dict_recent,
+        periods=last_months,
+        data_path=f"{data_path}/raw",
+    )
 
     return last_months
 
 
-def get_data_list_open_tenders(entries: list, ns: dict) -> list:
+def get_open_tender_record(entry, today: str = None) -> dict:
     """
-    Extracts the main information from the entries of the ATOM file and returns a list of dictionaries.
+    Extracts the open tenders information of a single ATOM entry.
+
+    Only entries with status 'PUB' whose submission deadline has not passed get all
+    the open tenders columns extracted. Other entries keep their general information
+    and status, which is all that is needed for them to supersede older versions of
+    the same tender when removing duplicates (and they are filtered out afterwards).
 
     Args:
-        entries (list): List of ATOM elements representing the entries.
-        ns (dict): Dictionary of namespaces used in the ATOM file.
+        entry (lxml.etree.Element): The ATOM entry element.
+        today (str, optional): The date deadlines are compared against, in ISO
+                               format (YYYY-MM-DD). Defaults to the current date.
 
     Returns:
-        list: A list of dictionaries, where each dictionary contains the extracted data for an entry.
+        dict or None: The extracted data, or None if the entry has no details.
     """
-    data = []
-
-    for entry in entries:
-        # Initialize entry data
-        entry_data = {}
+    details = details_xpath(entry)
+    if not details:
+        return None
+    details = details[0]
 
-        # Extract general information
-        for field in entry:
-            tag = field.tag.split("}")[-1]
+    # Extract general information
+    entry_data = {}
+    for field in entry:
+        tag = local_name(field.tag)
+        if tag not in dropped_entry_fields:
             entry_data[tag] = field.text if tag != "link" else field.get("href")
 
-        # Generate full details information
-        details = entry.find("cac-place-ext:ContractFolderStatus", ns)
-        details_dict = {}
+    # Check the status and deadline first so closed or expired entries skip the
+    # rest of the lookups
+    status = "_".join(status_xpath(details)) or None
+    entry_data["Status"] = status
+    if status != "PUB":
+        return entry_data
 
-        if details is not None:
-            recursive_field_dict(details, details_dict)
-            flat_details = flatten_dict(details_dict)
+    # ISO dates compare like strings; anything malformed that gets through is
+    # still dropped by remove_closed_and_expired
+    end_date = "_".join(end_date_xpath(details))
+    if end_date <= (today or date.today().isoformat()):
+        return entry_data
 
-            filtered_details = {
-                v: flat_details[k]
-                for k, v in open_tenders_cols.items()
-                if k in flat_details
-            }
+    fields = {}
+    collect_open_tenders_fields(details, fields)
+    for path, values in fields.items():
+        entry_data[open_tenders_cols[path]] = "_".join(values)
+
+    return entry_data
+
+
+def get_data_columns_open_tenders(entries) -> dict:
+    """
+    Extracts the main information from the entries of the ATOM file into columns.
+
+    The records are appended column by column following open_tenders_schema, so the
+    result can be turned into a dataframe without any schema inference.
+
+    Args:
+        entries (iterable): ATOM elements representing the entries (a list or a stream).
+
+    Returns:
+        dict: A dictionary mapping each column of open_tenders_schema to the list of
+              its values, one per extracted entry.
+    """
+    columns = {col: [] for col in open_tenders_schema}
+    today = date.today().isoformat()
+
+    for entry in entries:
+        entry_data = get_open_tender_record(entry, today)
+        if entry_data is not None:
+            for col, values in columns.items():
+                values.append(entry_data.get(col))
+
+    return columns
 
-            entry_data.update(filtered_details)
-            entry_data.pop("id")
-            entry_data.pop("summary")
-            entry_data.pop("ContractFolderStatus")
 
-            # Cast monetary amounts to float32
-            amount_fields = ["EstimatedAmount", "TotalAmount", "TaxExclusiveAmount"]
-            for field in amount_fields:
-                if field in entry_data:
-                    try:
-                        entry_data[field] = float(entry_data[field])
-                    except (ValueError, TypeError):
-                        entry_data[field] = None
+def iter_atom_paths(folder: str):
+    """
+    Recursively yields the full paths of the ATOM files under a folder.
+
+    Uses os.scandir, so each directory is listed once and no intermediate lists of
+    paths are built.
 
-            data.append(entry_data)
+    Args:
+        folder (str): The path to the folder where the ATOM files are.
 
-    return data
+    Yields:
+        str: The full path of each ATOM file found.
+    """
+    with os.scandir(folder) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_atom_paths(entry.path)
+            elif entry.name.endswith(".atom"):
+                yield entry.path
 
 
 def process_single_file(path):
     """
     Process a single ATOM file and extract open tenders data.
 
-    This helper function reads an ATOM file, extracts the entries and namespaces,
-    processes them to extract open tenders information, and returns the data list.
+    This helper function streams the entries of an ATOM file with iterparse, so only
+    one entry is kept in memory at a time, and extracts the open tenders information.
+    The records are returned already built into a dataframe, so the parent process
+    only has to concatenate the (cheaply pickled) frames of each worker.
     If processing fails or no data is found, it returns None.
 
     Args:
         path (str): The file path to the ATOM file to process.
 
     Returns:
-        list or None: A list of dictionaries containing the extracted open tenders data,
+        pl.DataFrame or None: A dataframe with the extracted open tenders data,
                      or None if processing failed or no data was found.
 
     Example:
-        >>> data = process_single_file("path/to/atom/file.xml")
-        >>> if data:
-        ...     print(f"Extracted {len(data)} records")
+        >>> df = process_single_file("path/to/atom/file.xml")
+        >>> if df is not None:
+        ...     print(f"Extracted {df.height} records")
         ... else:
         ...     print("No data found or processing failed")
     """
     try:
-        entries, ns = get_atom_data(path)
-        data_list = get_data_list_open_tenders(entries, ns)
-        return data_list if len(data_list) > 0 else None
+        columns = get_data_columns_open_tenders(iter_atom_entries(path))
+        if len(columns["link"]) == 0:
+            return None
+        # Build the amounts as text and let Polars cast them (unparsable ones to null)
+        return pl.DataFrame(
+            columns,
+            schema={**open_tenders_schema, **{col: pl.Utf8 for col in amount_cols}},
+        ).with_columns(
+            pl.col(amount_cols).str.strip_chars().cast(pl.Float64, strict=False)
+        )
     except Exception:
         return None
 
 
-def process_batch(paths_batch, batch_num, tmp_dir):
+def process_batch(paths_batch, batch_num, executor, max_workers):
     """
-    Process a batch of ATOM files in parallel and save results to parquet.
+    Process a batch of ATOM files in parallel and combine the results.
 
-    This helper function processes multiple ATOM files concurrently using a ProcessPoolExecutor,
-    collects the results, and saves them to a temporary parquet file. It handles failed
-    processing gracefully and reports the number of failed files.
+    This helper function processes multiple ATOM files concurrently on the given
+    ProcessPoolExecutor, which is shared by all batches so the worker processes are
+    only started once, and combines the results into a single dataframe. Every file is
+    built with open_tenders_schema, so all batches can be appended to the same parquet
+    file. It handles failed processing gracefully and reports the number of failed files.
 
     Args:
         paths_batch (list): List of file paths to process in this batch.
-        batch_num (int): The batch number for naming the output file.
-        tmp_dir (str): Directory path where temporary parquet files should be saved.
+        batch_num (int): The batch number, used when reporting failed files.
+        executor (ProcessPoolExecutor): The executor running the workers.
+        max_workers (int): The number of workers of the executor.
 
     Returns:
-        int: The number of successfully processed records in this batch.
+        pl.DataFrame or None: The records of this batch, or None if no records
+                     were extracted.
 
     Example:
-        >>> records = process_batch(["file1.xml", "file2.xml"], 1, "/tmp/batches")
-        >>> print(f"Processed {records} records in batch 1")
+        >>> with ProcessPoolExecutor(max_workers=4) as executor:
+        ...     df = process_batch(["file1.xml", "file2.xml"], 1, executor, 4)
+        >>> print(f"Processed {df.height} records in batch 1")
     """
     results = []
     null_paths = []
-    max_workers = max((os.cpu_count()) - 2, 1)
 
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
-        results_iter = executor.map(process_single_file, paths_batch)
+    # Send several paths per task to cut down on pickling and IPC round-trips
+    chunksize = max(1, len(paths_batch) // (max_workers * 4))
+    results_iter = executor.map(process_single_file, paths_batch, chunksize=chunksize)
 
-        for path, result in zip(paths_batch, results_iter):
-            if result is not None:
-                results.extend(result)
-            else:
-                null_paths.append(path)
+    for path, result in zip(paths_batch, results_iter):
+        if result is not None:
+            results.append(result)
+        else:
+            null_paths.append(path)
 
     if null_paths:
         print(
             f"Processing gave null results for {len(null_paths)} files in batch {batch_num}"
         )
 
-    if results:
-        df = pl.DataFrame(results)
-        batch_file = os.path.join(tmp_dir, f"batch_{batch_num}.parquet")
-        df.write_parquet(batch_file, compression="snappy")
-        return len(results)
-    return 0
+    if not results:
+        return None
+
+    return pl.concat(results, how="vertical")
 
 
 def get_parquet_open_tenders(paths: list, data_path: str, name="open_tenders") -> dict:
@@ -286,12 +422,15 @@ def get_parquet_open_tenders(paths: list, data_path: str, name="open_tenders") -
     Process ATOM files in batches and create a consolidated parquet file.
 
     This function processes a large number of ATOM files by breaking them into batches
-    of 100 files each. Each batch is processed in parallel and saved as a temporary
-    parquet file. All temporary files are then combined into a single parquet file
-    with duplicates removed based on the 'link' field.
+    of 100 files each. Each batch is processed in parallel and appended as a row group
+    to a single staging parquet file, after dropping duplicates within the batch.
+    The staging file is then scanned by a single lazy query that removes the
+    duplicates based on the 'link' field across batches, keeps only open tenders and
+    sinks the result into the final parquet file.
 
     Args:
-        paths (list): A list with the full paths to the ATOM files to process.
+        paths (iterable): The full paths to the ATOM files to process (a list or a
+                          generator such as iter_atom_paths).
         data_path (str): The directory path where the final parquet file should be saved.
         name (str, optional): The name for the output parquet file (without extension).
                             Defaults to "open_tenders".
@@ -310,62 +449,113 @@ def get_parquet_open_tenders(paths: list, data_path: str, name="open_tenders") -
         >>> print(f"Data shape: {result['df_shape']}")
     """
 
-    parquet_path = os.path.join(data_path, f"{name}.parquet")
-
-    # Create temporary directory
-    tmp_dir = os.path.join(data_path, "tmp")
-    os.makedirs(tmp_dir, exist_ok=True)
+    data_dir = Path(data_path)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    parquet_path = data_dir / f"{name}.parquet"
+    staging_path = data_dir / f"{name}_staging.parquet"
 
-    # Process in batches of 100
+    # Process in batches of 100, appending each one to the staging parquet file
     batch_size = 100
     total_records = 0
-
-    for i in tqdm(
-        range(0, len(paths), batch_size), desc="Processing batches", unit="batch"
-    ):
-        batch_paths = paths[i : i + batch_size]  # noqa: E203
-        records = process_batch(batch_paths, i // batch_size, tmp_dir)
-        total_records += records
-
-    if total_records == 0:
-        raise ValueError("No files were successfully processed")
-
-    # Read all parquet files and combine
-    print("Combining all batches...")
-    parquet_files = [
-        os.path.join(tmp_dir, f) for f in os.listdir(tmp_dir) if f.endswith(".parquet")
-    ]
-    final_df = pl.concat(
-        [pl.scan_parquet(f) for f in parquet_files], how="diagonal"
-    ).collect()
-
-    final_df_no_dups = remove_duplicates(final_df, "link")
+    writer = None
+    max_workers = get_max_workers()
+
+    def write_batch(batch_df):
+        """Remove the duplicates of a batch and append it to the staging file."""
+        nonlocal writer, total_records
+        # Drop superseded versions early so the staging file stays small. This is
+        # done inline rather than with remove_duplicates, whose print would break
+        # the progress bar from this background thread.
+        batch_table = (
+            batch_df.with_columns(
+                pl.col("updated").str.strptime(
+                    pl.Datetime, format="%Y-%m-%dT%H:%M:%S%.fZ", strict=False
+                )
+            )
+            .group_by("link")
+            .agg(latest_version)
+            .select(batch_df.columns)
+            .to_arrow()
+        )
+        if writer is None:
+            writer = pq.ParquetWriter(
+                staging_path,
+                batch_table.schema,
+                compression="zstd",
+                compression_level=1,
+                use_dictionary=True,
+            )
+        writer.write_table(batch_table)
+        total_records += batch_table.num_rows
 
     def remove_closed_and_expired(df):
         """
         Remove closed tenders and expired ones from the dataframe.
 
         Args:
-            df (pl.DataFrame): Input dataframe containing tender data
+            df (pl.LazyFrame): Input (lazy) dataframe containing tender data
 
         Returns:
-            pl.DataFrame: Filtered dataframe with only open and active tenders
+            pl.LazyFrame: Filtered dataframe with only open and active tenders
         """
         today = date.today()
         return df.filter(pl.col("Status") == "PUB").filter(
             pl.col("ProcessEndDate").str.strptime(pl.Date, format="%Y-%m-%d", strict=False) > today
         )
 
-    open_tenders_df = remove_closed_and_expired(final_df_no_dups)
+    # paths can be a lazy iterator, so batches are pulled from it as they are needed
+    paths_iter = iter(paths)
+    batches = iter(lambda: list(islice(paths_iter, batch_size)), [])
 
-    open_tenders_df.write_parquet(parquet_path, compression="snappy")
+    try:
+        # A single pool of workers parses every batch while a background thread
+        # writes the previous one, so parsing and disk I/O overlap
+        with (
+            ProcessPoolExecutor(max_workers=max_workers) as executor,
+            ThreadPoolExecutor(max_workers=1) as write_executor,
+        ):
+            write_future = None
+            for batch_num, batch_paths in enumerate(
+                tqdm(batches, desc="Processing batches", unit="batch")
+            ):
+                batch_df = process_batch(batch_paths, batch_num, executor, max_workers)
+                if batch_df is None:
+                    continue
+
+                # Keep at most one batch waiting to be written to bound memory
+                if write_future is not None:
+                    write_future.result()
+                write_future = write_executor.submit(write_batch, batch_df)
+
+            if write_future is not None:
+                write_future.result()
+
+        if writer is not None:
+            writer.close()
+            writer = None
+
+        if total_records == 0:
+            raise ValueError("No files were successfully processed")
+
+        # Keep the most recent version of each tender and only the open ones,
+        # streaming from the staging file straight into the final parquet file
+        staging_lf = pl.scan_parquet(staging_path)
+        columns = staging_lf.collect_schema().names()
+        (
+            staging_lf.group_by("link")
+            .agg(latest_version)
+            .select(columns)
+            .pipe(remove_closed_and_expired)
+            .sink_parquet(parquet_path, compression="zstd", compression_level=3)
+        )
+    finally:
+        if writer is not None:
+            writer.close()
+        staging_path.unlink(missing_ok=True)
 
-    # Cleanup temporary files
-    for f in parquet_files:
-        os.remove(f)
-    os.rmdir(tmp_dir)
+    n_rows = pl.scan_parquet(parquet_path).select(pl.len()).collect().item()
 
-    return {"parquet_path": parquet_path, "df_shape": open_tenders_df.shape}
+    return {"parquet_path": str(parquet_path), "df_shape": (n_rows, len(columns))}
 
 
 def open_tenders_parquet(source_url: str, data_path: str, name="open_tenders_raw"):
@@ -399,11 +589,8 @@ def open_tenders_parquet(source_url: str, data_path: str, name="open_tenders_raw
     last_months = download_recent_data(source_url, data_path)
 
     folder = get_folder_path("raw", data_path)
-    full_paths = [
-        i for s in [get_full_paths(f) for f in get_full_paths(folder)] for i in s
-    ]
 
-    parquet_dict = get_parquet_open_tenders(full_paths, data_path, name)
+    parquet_dict = get_parquet_open_tenders(iter_atom_paths(folder), data_path, name)
 
     for month in last_months:
         delete_files(period=month, data_path=f"{data_path}/raw")
@@ -413,6 +600,34 @@ def open_tenders_parquet(source_url: str, data_path: str, name="open_tenders_raw
     )
 
 
+@lru_cache(maxsize=32)
+def _read_code_map(path: str, mtime_ns: int) -> dict:
+    """
+    Reads a reference table into a code -> name dict. The modification time is part
+    of the cache key, so an updated table is read again.
+    """
+    df = pl.read_parquet(path, columns=["code", "nombre"])
+    return dict(df.iter_rows())
+
+
+def make_map(filename: str, data_path: str) -> dict:
+    """
+    Returns the mapping of codes to names of a reference table.
+
+    The tables are cached per process, so repeated map_codes calls don't read the
+    same parquet files again unless they have changed.
+
+    Args:
+        filename (str): Name of the reference parquet file (without extension).
+        data_path (str): Path to the directory containing the reference files.
+
+    Returns:
+        dict: A dictionary mapping each code to its human-readable name.
+    """
+    path = f"{data_path}/{filename}.parquet"
+    return _read_code_map(path, os.stat(path).st_mtime_ns)
+
+
 def map_codes(
     data_path: str = "data/open_tenders",
     raw_name="open_tenders_raw",
@@ -456,11 +671,6 @@ def map_codes(
         >>> print(df.head())
     """
 
-    def make_map(filename, data_path):
-        df = pl.read_parquet(f"{data_path}/{filename}.parquet")
-        d = df.select(["code", "nombre"]).to_dict(as_series=False)
-        return dict(zip(d["code"], d["nombre"]))
-
     # Mapping info: (column, parquet filename)
     mapping_info = [
         ("ProcessCode", "TenderingProcessCode"),
@@ -478,62 +688,41 @@ def map_codes(
         "Patrimonial": make_map("PatrimonialContractCode", data_path),
     }
 
-    # Read open tenders data
-    df = pl.read_parquet(f"{data_path}/{raw_name}.parquet")
-
     # Map simple columns (excluding CPVCode which needs special handling)
-    for col in ["ProcessCode", "ProjectTypeCode"]:
-        df = df.with_columns(
-            [
-                pl.col(col)
-                .map_elements(lambda x, m=maps[col]: m.get(x, x), return_dtype=pl.Utf8)
-                .alias(col)
-            ]
-        )
+    code_exprs = [
+        pl.col(col).replace(maps[col]) for col in ["ProcessCode", "ProjectTypeCode"]
+    ]
 
-    # Special handling for CPV codes that can contain multiple codes separated by underscores
-    def map_cpv_codes(cpv_value, cpv_map):
-        if not cpv_value or cpv_value == "":
-            return []
-
-        # Split by underscore to handle multiple codes
-        codes = cpv_value.split("_")
-        # Map each code to its human-readable name
-        mapped_names = [cpv_map.get(code, code) for code in codes if code.strip()]
-        return mapped_names
-
-    # Map CPV codes to lists of human-readable names
-    df = df.with_columns(
-        [
-            pl.col("CPVCode")
-            .map_elements(
-                lambda x, m=maps["CPVCode"]: map_cpv_codes(x, m),
-                return_dtype=pl.List(pl.Utf8),
-            )
-            .alias("CPVCode")
-        ]
+    # CPV codes can contain multiple codes separated by underscores:
+    # split them, drop empty parts and map each code to its human-readable name
+    cpv_expr = (
+        pl.col("CPVCode")
+        .str.split("_")
+        .list.eval(
+            pl.element()
+            .filter(pl.element().str.strip_chars() != "")
+            .replace(maps["CPVCode"])
+        )
     )
 
-    # Conditional mapping for ProjectSubTypeCode
-    def map_project_subtype(row):
-        project_type = row["ProjectTypeCode"]
-        sub_type_code = row["ProjectSubTypeCode"]
-        m = subtype_maps.get(project_type)
-        if m:
-            return m.get(sub_type_code, sub_type_code)
-        return sub_type_code
-
-    df = df.with_columns(
-        [
-            pl.struct(["ProjectTypeCode", "ProjectSubTypeCode"])
-            .map_elements(map_project_subtype, return_dtype=pl.Utf8)
-            .alias("ProjectSubTypeCode")
-        ]
-    )
+    # Conditional mapping for ProjectSubTypeCode, keyed on the (mapped) project type
+    subtype_expr = pl.col("ProjectSubTypeCode")
+    for project_type, m in subtype_maps.items():
+        subtype_expr = (
+            pl.when(pl.col("ProjectTypeCode") == project_type)
+            .then(pl.col("ProjectSubTypeCode").replace(m))
+            .otherwise(subtype_expr)
+        )
 
-    # Save mapped data
+    # Read, map and save the open tenders data as a single lazy query
     output_path = f"{data_path}/{mapped_name}.parquet"
-    df.write_parquet(output_path)
+    (
+        pl.scan_parquet(f"{data_path}/{raw_name}.parquet")
+        .with_columns(*code_exprs, cpv_expr)
+        .with_columns(subtype_expr.alias("ProjectSubTypeCode"))
+        .sink_parquet(output_path)
+    )
+    df = pl.read_parquet(output_path)
     print(f"Mapped data saved to {output_path}")
     return df
 
@@ -579,74 +768,65 @@ def save_mapped_data_to_json(
         >>> json_path = save_mapped_data_to_json("data/open_tenders", "my_tenders")
         >>> print(f"JSON file saved at: {json_path}")
     """
-    # Read mapped data
-    df = pl.read_parquet(f"{data_path}/{name}.parquet")
+    # Read mapped data lazily, casting EstimatedAmount to float
+    lf = pl.scan_parquet(f"{data_path}/{name}.parquet").with_columns(
+        pl.col("EstimatedAmount").cast(pl.Float64)
+    )
 
-    # Cast EstimatedAmount to float
-    df = df.with_columns(pl.col("EstimatedAmount").cast(pl.Float64))
+    # Compute all the statistics for the metadata in a single pass
+    amount = pl.col("EstimatedAmount")
+    stats = (
+        lf.select(
+            pl.len().alias("total_records"),
+            pl.col("updated").max().alias("most_recent_update"),
+            pl.col("updated").min().alias("earliest_update"),
+            amount.sum().alias("total_estimated_amount"),
+            amount.max().alias("max_estimated_amount"),
+            amount.min().alias("min_estimated_amount"),
+            amount.mean().alias("avg_estimated_amount"),
+            amount.median().alias("median_estimated_amount"),
+        )
+        .collect()
+        .row(0, named=True)
+    )
+
+    df = lf.collect()
 
     # Create metadata dictionary with datetime converted to unix timestamps
     metadata = {
-        "total_records": df.height,
+        "total_records": stats["total_records"],
         "schema": {col: str(dtype) for col, dtype in zip(df.columns, df.dtypes)},
         "created_at": int(datetime.now().timestamp()),
         "most_recent_update": (
-            df.select(pl.col("updated")).max().item().isoformat()
-            if df.select(pl.col("updated")).max().item()
+            stats["most_recent_update"].isoformat()
+            if stats["most_recent_update"]
             else None
         ),
         "earliest_update": (
-            df.select(pl.col("updated")).min().item().isoformat()
-            if df.select(pl.col("updated")).min().item()
-            else None
-        ),
-        "total_estimated_amount": (
-            df.select(pl.col("EstimatedAmount")).sum().item()
-            if df.select(pl.col("EstimatedAmount")).sum().item()
-            else 0
-        ),
-        "max_estimated_amount": (
-            df.select(pl.col("EstimatedAmount")).max().item()
-            if df.select(pl.col("EstimatedAmount")).max().item()
-            else 0
-        ),
-        "min_estimated_amount": (
-            df.select(pl.col("EstimatedAmount")).min().item()
-            if df.select(pl.col("EstimatedAmount")).min().item()
-            else 0
-        ),
-        "avg_estimated_amount": (
-            df.select(pl.col("EstimatedAmount")).mean().item()
-            if df.select(pl.col("EstimatedAmount")).mean().item()
-            else 0
-        ),
-        "median_estimated_amount": (
-            df.select(pl.col("EstimatedAmount")).median().item()
-            if df.select(pl.col("EstimatedAmount")).median().item()
-            else 0
+            stats["earliest_update"].isoformat() if stats["earliest_update"] else None
         ),
+        "total_estimated_amount": stats["total_estimated_amount"] or 0,
+        "max_estimated_amount": stats["max_estimated_amount"] or 0,
+        "min_estimated_amount": stats["min_estimated_amount"] or 0,
+        "avg_estimated_amount": stats["avg_estimated_amount"] or 0,
+        "median_estimated_amount": stats["median_estimated_amount"] or 0,
     }
 
     # Save metadata and data separately
     json_path = f"{data_path}/{name}.json"
 
-    with open(json_path, "w", encoding="utf-8") as f:
+    # Convert datetimes to unix timestamps on the columns instead of record by record
+    df = df.with_columns(pl.col(pl.Datetime).dt.epoch("s"))
+
+    with open(json_path, "wb") as f:
         # Write metadata first
-        f.write('{\n"metadata":')
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
-
-        # Write data records one by one, converting datetimes to unix timestamps
-        f.write(',\n"data": [\n')
-        for i, record in enumerate(df.iter_rows(named=True)):
-            if i > 0:
-                f.write(",\n")
-            # Convert any datetime values to unix timestamps
-            record_unix = {
-                k: int(v.timestamp()) if hasattr(v, "timestamp") else v
-                for k, v in record.items()
-            }
-            json.dump(record_unix, f, ensure_ascii=False)
-        f.write("\n]}")
+        f.write(b'{\n"metadata":')
+        f.write(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
+
+        # Write all the data records at once with Polars' JSON writer
+        f.write(b',\n"data": ')
+        f.write(df.write_json().encode("utf-8"))
+        f.write(b"}")
 
     print(f"Mapped data with metadata saved to {json_path}")
     return json_path
@@ -1,15 +1,20 @@
 import pytest
+import shutil
+from types import MappingProxyType
 import polars as pl
 import lxml.etree as ET
 from datetime import datetime, timedelta
 
+# Fixtures returning strings or Polars DataFrames (which tests can't modify in
+# place) are built once per session; mutable dicts and lists stay per test.
 
-@pytest.fixture
+
+@pytest.fixture(scope="session")
 def sample_url():
     return "http://example.com"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_html_content():
     return """
     <html>
@@ -21,7 +26,7 @@ def sample_html_content():
     """
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_atom_content():
     return """
     <feed xmlns="http://www.w3.org/2005/Atom">
@@ -32,8 +37,22 @@ def sample_atom_content():
     """
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def sample_atom_feed():
+    return """<?xml version="1.0" encoding="UTF-8"?>
+    <feed xmlns="http://www.w3.org/2005/Atom">
+        <entry>
+            <title>Example Entry</title>
+            <link href="http://example.com"/>
+            <updated>2023-01-01T00:00:00Z</updated>
+        </entry>
+    </feed>
+    """
+
+
+@pytest.fixture(scope="session")
 def sample_entries():
+    # Parsed once; the entries are only read by the tests, so a tuple is shared
     entry_xml = """
     <entry xmlns="http://www.w3.org/2005/Atom">
         <title>Example Entry</title>
@@ -41,7 +60,7 @@ def sample_entries():
         <updated>2023-01-01T00:00:00Z</updated>
     </entry>
     """
-    return [ET.fromstring(entry_xml)]
+    return (ET.fromstring(entry_xml),)
 
 
 @pytest.fixture
@@ -49,7 +68,7 @@ def sample_nested_dict():
     return {"a": {"b": {"c": 1}}, "d": 2}
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_period():
     return "202101"
 
@@ -59,37 +78,54 @@ def sample_source_data():
     return {"202101": "https://example.com/contratacion202101.zip"}
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_df_with_duplicates():
     return pl.DataFrame(
-        [
-            {
-                "id": "1",
-                "link": "http://example.com",
-                "title": "Example Entry",
-                "updated": "2023-01-01T00:00:00Z",
-            },
-            {
-                "id": "1",
-                "link": "http://example.com",
-                "title": "Example Entry",
-                "updated": "2023-01-02T00:00:00Z",
-            },
-        ]
+        {
+            "id": ["1", "1"],
+            "link": ["http://example.com", "http://example.com"],
+            "title": ["Example Entry", "Example Entry"],
+            "updated": ["2023-01-01T00:00:00Z", "2023-01-02T00:00:00Z"],
+        },
+        schema=dict.fromkeys(["id", "link", "title", "updated"], pl.Utf8),
     )
 
 
+@pytest.fixture(scope="session")
+def parquet_pair_template(tmp_path_factory, sample_df_with_duplicates):
+    """Two parquet files with the duplicated sample data, written once per session"""
+    template_dir = tmp_path_factory.mktemp("parquet_template")
+    sample_df_with_duplicates.write_parquet(template_dir / "file1.parquet")
+    sample_df_with_duplicates.write_parquet(template_dir / "file2.parquet")
+    return template_dir
+
+
+@pytest.fixture
+def parquet_pair_dir(parquet_pair_template, tmp_path):
+    """A per-test copy of the parquet pair, so tests can add files next to it"""
+    return shutil.copytree(parquet_pair_template, tmp_path / "parquet")
+
+
+@pytest.fixture(scope="session")
+def local_db_template(tmp_path_factory, sample_parquet_files_data):
+    """A local_db folder with two parquet tables, written once per session"""
+    template_dir = tmp_path_factory.mktemp("local_db_template")
+    sample_parquet_files_data.write_parquet(template_dir / "base_table.parquet")
+    sample_parquet_files_data.write_parquet(template_dir / "ContractCode.parquet")
+    return template_dir
+
+
 @pytest.fixture
 def sample_mappings():
     return {"title": "title", "link": "link", "updated": "updated"}
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_folder():
     return "data/202101"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_parquet_path():
     return "data/parquet/202101.parquet"
 
@@ -99,7 +135,7 @@ def mock_source_data():
     return {"2023": "url1", "2022": "url2", "202301": "url3", "202302": "url4"}
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_codice():
     return """
     <SimpleCodeList>
@@ -129,17 +165,19 @@ def sample_codice():
     """
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_df_for_mapping():
     return pl.DataFrame(
-        [
-            {
-                "original_title": "Example Title",
-                "original_link": "http://example.com",
-                "original_date": "2023-01-01",
-                "extra_field": "should be removed",
-            }
-        ]
+        {
+            "original_title": ["Example Title"],
+            "original_link": ["http://example.com"],
+            "original_date": ["2023-01-01"],
+            "extra_field": ["should be removed"],
+        },
+        schema=dict.fromkeys(
+            ["original_title", "original_link", "original_date", "extra_field"],
+            pl.Utf8,
+        ),
     )
 
 
@@ -159,142 +197,135 @@ def sample_data_list():
     ]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_df():
     return pl.DataFrame(
-        [
-            {
-                "title": "Example Entry",
-                "link": "http://example.com",
-                "updated": "2023-01-01T00:00:00Z",
-            }
-        ]
+        {
+            "title": ["Example Entry"],
+            "link": ["http://example.com"],
+            "updated": ["2023-01-01T00:00:00Z"],
+        },
+        schema=dict.fromkeys(["title", "link", "updated"], pl.Utf8),
     )
 
 
 # Open Tenders specific fixtures
 @pytest.fixture
 def sample_open_tenders_data():
-    """Sample open tenders data for testing"""
-    return [
-        {
-            "title": "Test Tender 1",
-            "link": "http://example.com/tender1",
-            "updated": "2023-01-01T00:00:00Z",
-            "ID": "123",
-            "StatusCode": "PUB",
-            "ContractingParty": "Test Party 1",
-            "City": "Madrid",
-            "Country": "Spain",
-            "ZipCode": "28001",
-            "ProjectTypeCode": "Suministros",
-            "ProjectSubTypeCode": "001",
-            "CPVCode": "30000000",
-            "CPVLotCode": "30000000",
-            "EstimatedAmount": "100000",
-            "TotalAmount": "100000",
-            "TaxExclusiveAmount": "82645",
-            "ProcessCode": "OBJ",
-            "ProcessEndDate": "2023-02-01T00:00:00Z",
-        },
-        {
-            "title": "Test Tender 2",
-            "link": "http://example.com/tender2",
-            "updated": "2023-01-02T00:00:00Z",
-            "ID": "456",
-            "StatusCode": "PUB",
-            "ContractingParty": "Test Party 2",
-            "City": "Barcelona",
-            "Country": "Spain",
-            "ZipCode": "08001",
-            "ProjectTypeCode": "Servicios",
-            "ProjectSubTypeCode": "002",
-            "CPVCode": "72000000",
-            "CPVLotCode": "72000000",
-            "EstimatedAmount": "200000",
-            "TotalAmount": "200000",
-            "TaxExclusiveAmount": "165289",
-            "ProcessCode": "SUBJ",
-            "ProcessEndDate": "2023-02-02T00:00:00Z",
-        },
-    ]
+    """Sample open tenders data for testing, by column"""
+    return {
+        "title": ["Test Tender 1", "Test Tender 2"],
+        "link": ["http://example.com/tender1", "http://example.com/tender2"],
+        "updated": ["2023-01-01T00:00:00Z", "2023-01-02T00:00:00Z"],
+        "ID": ["123", "456"],
+        "StatusCode": ["PUB", "PUB"],
+        "ContractingParty": ["Test Party 1", "Test Party 2"],
+        "City": ["Madrid", "Barcelona"],
+        "Country": ["Spain", "Spain"],
+        "ZipCode": ["28001", "08001"],
+        "ProjectTypeCode": ["Suministros", "Servicios"],
+        "ProjectSubTypeCode": ["001", "002"],
+        "CPVCode": ["30000000", "72000000"],
+        "CPVLotCode": ["30000000", "72000000"],
+        "EstimatedAmount": ["100000", "200000"],
+        "TotalAmount": ["100000", "200000"],
+        "TaxExclusiveAmount": ["82645", "165289"],
+        "ProcessCode": ["OBJ", "SUBJ"],
+        "ProcessEndDate": ["2023-02-01T00:00:00Z", "2023-02-02T00:00:00Z"],
+    }
 
 
 @pytest.fixture
 def sample_open_tenders_df(sample_open_tenders_data):
     """Sample open tenders DataFrame"""
-    return pl.DataFrame(sample_open_tenders_data)
+    return pl.DataFrame(
+        sample_open_tenders_data,
+        schema=dict.fromkeys(sample_open_tenders_data, pl.Utf8),
+    )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_mapping_tables():
-    """Sample mapping tables for testing"""
-    return {
-        "TenderingProcessCode": pl.DataFrame(
-            {
-                "code": ["OBJ", "SUBJ"],
-                "nombre": ["Automatically evaluated", "Not automatically evaluated"],
-            }
-        ),
-        "ContractCode": pl.DataFrame(
-            {
-                "code": ["Suministros", "Servicios", "Obras", "Patrimonial"],
-                "nombre": ["Goods", "Services", "Works", "Patrimonial"],
-            }
-        ),
-        "CPV2008": pl.DataFrame(
-            {
-                "code": ["30000000", "72000000"],
-                "nombre": ["Office and computing machinery", "IT services"],
-            }
-        ),
-        "GoodsContractCode": pl.DataFrame(
-            {"code": ["001", "002"], "nombre": ["Goods Type 1", "Goods Type 2"]}
-        ),
-        "ServiceContractCode": pl.DataFrame(
-            {"code": ["001", "002"], "nombre": ["Service Type 1", "Service Type 2"]}
-        ),
-        "WorksContractCode": pl.DataFrame(
-            {"code": ["001", "002"], "nombre": ["Works Type 1", "Works Type 2"]}
-        ),
-        "PatrimonialContractCode": pl.DataFrame(
-            {
-                "code": ["001", "002"],
-                "nombre": ["Patrimonial Type 1", "Patrimonial Type 2"],
-            }
-        ),
-    }
-
-
-@pytest.fixture
-def sample_atom_entries():
-    """Sample ATOM entries for testing"""
-    from unittest.mock import MagicMock
+    """Sample mapping tables for testing, as read-only lazy frames"""
+    return MappingProxyType(
+        {
+            "TenderingProcessCode": pl.LazyFrame(
+                {
+                    "code": ["OBJ", "SUBJ"],
+                    "nombre": [
+                        "Automatically evaluated",
+                        "Not automatically evaluated",
+                    ],
+                }
+            ),
+            "ContractCode": pl.LazyFrame(
+                {
+                    "code": ["Suministros", "Servicios", "Obras", "Patrimonial"],
+                    "nombre": ["Goods", "Services", "Works", "Patrimonial"],
+                }
+            ),
+            "CPV2008": pl.LazyFrame(
+                {
+                    "code": ["30000000", "72000000"],
+                    "nombre": ["Office and computing machinery", "IT services"],
+                }
+            ),
+            "GoodsContractCode": pl.LazyFrame(
+                {"code": ["001", "002"], "nombre": ["Goods Type 1", "Goods Type 2"]}
+            ),
+            "ServiceContractCode": pl.LazyFrame(
+                {"code": ["001", "002"], "nombre": ["Service Type 1", "Service Type 2"]}
+            ),
+            "WorksContractCode": pl.LazyFrame(
+                {"code": ["001", "002"], "nombre": ["Works Type 1", "Works Type 2"]}
+            ),
+            "PatrimonialContractCode": pl.LazyFrame(
+                {
+                    "code": ["001", "002"],
+                    "nombre": ["Patrimonial Type 1", "Patrimonial Type 2"],
+                }
+            ),
+        }
+    )
 
-    entries = []
-    for i in range(2):
-        entry = MagicMock()
-        entry.tag = "{http://www.w3.org/2005/Atom}entry"
 
-        # Mock title
-        title = MagicMock()
-        title.tag = "{http://www.w3.org/2005/Atom}title"
-        title.text = f"Test Tender {i+1}"
+@pytest.fixture(scope="session")
+def mapping_tables_template(tmp_path_factory, sample_mapping_tables):
+    """The sample mapping tables as parquet files, written once per session"""
+    template_dir = tmp_path_factory.mktemp("mapping_tables_template")
+    for filename, lf in sample_mapping_tables.items():
+        lf.sink_parquet(template_dir / f"{filename}.parquet")
+    return template_dir
 
-        # Mock link
-        link = MagicMock()
-        link.tag = "{http://www.w3.org/2005/Atom}link"
-        link.get.return_value = f"http://example.com/tender{i+1}"
 
-        # Mock updated
-        updated = MagicMock()
-        updated.tag = "{http://www.w3.org/2005/Atom}updated"
-        updated.text = f"2023-01-0{i+1}T00:00:00Z"
+@pytest.fixture
+def mapping_tables_dir(mapping_tables_template, tmp_path):
+    """A per-test folder linking to the shared mapping tables, for the raw data to go in"""
+    for table in mapping_tables_template.iterdir():
+        (tmp_path / table.name).symlink_to(table)
+    return tmp_path
 
-        entry.__iter__ = MagicMock(return_value=iter([title, link, updated]))
-        entries.append(entry)
 
-    return entries
+@pytest.fixture(scope="session")
+def sample_atom_entries():
+    """Sample ATOM entries for testing"""
+    feed = ET.fromstring(
+        """
+    <feed xmlns="http://www.w3.org/2005/Atom">
+        <entry>
+            <title>Test Tender 1</title>
+            <link href="http://example.com/tender1"/>
+            <updated>2023-01-01T00:00:00Z</updated>
+        </entry>
+        <entry>
+            <title>Test Tender 2</title>
+            <link href="http://example.com/tender2"/>
+            <updated>2023-01-02T00:00:00Z</updated>
+        </entry>
+    </feed>
+    """
+    )
+    return tuple(feed)
 
 
 @pytest.fixture
@@ -307,63 +338,22 @@ def sample_namespaces():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_atom_entry_with_all_fields():
     """Sample ATOM entry with all required fields including ContractFolderStatus"""
-    from unittest.mock import MagicMock
-
-    # Create mock entry with proper structure
-    mock_entry = MagicMock()
-    mock_entry.tag = "{http://www.w3.org/2005/Atom}entry"
-
-    # Mock field elements
-    mock_title = MagicMock()
-    mock_title.tag = "{http://www.w3.org/2005/Atom}title"
-    mock_title.text = "Test Tender"
-
-    mock_link = MagicMock()
-    mock_link.tag = "{http://www.w3.org/2005/Atom}link"
-    mock_link.get.return_value = "http://example.com"
-
-    mock_updated = MagicMock()
-    mock_updated.tag = "{http://www.w3.org/2005/Atom}updated"
-    mock_updated.text = "2023-01-01T00:00:00Z"
-
-    # Add id and summary fields that will be popped
-    mock_id = MagicMock()
-    mock_id.tag = "{http://www.w3.org/2005/Atom}id"
-    mock_id.text = "test-id"
-
-    mock_summary = MagicMock()
-    mock_summary.tag = "{http://www.w3.org/2005/Atom}summary"
-    mock_summary.text = "test summary"
-
-    # Add ContractFolderStatus field that will be popped
-    mock_contract_folder_status = MagicMock()
-    mock_contract_folder_status.tag = (
-        "{http://www.w3.org/2005/Atom}ContractFolderStatus"
-    )
-    mock_contract_folder_status.text = "test status"
-
-    mock_entry.__iter__ = MagicMock(
-        return_value=iter(
-            [
-                mock_title,
-                mock_link,
-                mock_updated,
-                mock_id,
-                mock_summary,
-                mock_contract_folder_status,
-            ]
-        )
+    return ET.fromstring(
+        """
+    <entry xmlns="http://www.w3.org/2005/Atom">
+        <title>Test Tender</title>
+        <link href="http://example.com"/>
+        <updated>2023-01-01T00:00:00Z</updated>
+        <id>test-id</id>
+        <summary>test summary</summary>
+        <ContractFolderStatus>test status</ContractFolderStatus>
+    </entry>
+    """
     )
 
-    # Mock details with PUB status
-    mock_details = MagicMock()
-    mock_entry.find.return_value = mock_details
-
-    return mock_entry
-
 
 @pytest.fixture
 def sample_flattened_details_pub():
@@ -386,7 +376,7 @@ def sample_flattened_details_non_pub():
     return {"ContractFolderStatusCode": "CLOSED", "ContractFolderID": "123"}
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_raw_data_for_mapping():
     """Sample raw data for code mapping tests"""
     return pl.DataFrame(
@@ -400,7 +390,7 @@ def sample_raw_data_for_mapping():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_raw_data_with_unknown_codes():
     """Sample raw data with unknown codes for testing"""
     return pl.DataFrame(
@@ -417,7 +407,7 @@ def sample_raw_data_with_unknown_codes():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_mapped_data_with_metadata():
     """Sample mapped data with metadata for JSON conversion tests"""
     return pl.DataFrame(
@@ -431,7 +421,7 @@ def sample_mapped_data_with_metadata():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_mapped_data_without_updated():
     """Sample mapped data without updated field for JSON conversion tests"""
     return pl.DataFrame(
@@ -444,7 +434,7 @@ def sample_mapped_data_without_updated():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_mapped_data_with_updated():
     """Sample mapped data with updated field for testing JSON conversion"""
     return pl.DataFrame(
@@ -467,13 +457,21 @@ def sample_mapped_data_with_updated():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def mapped_parquet_path(tmp_path_factory, sample_mapped_data_with_updated):
+    """The mapped sample data with updated field as parquet, written once per session"""
+    parquet_path = tmp_path_factory.mktemp("mapped") / "open_tenders.parquet"
+    sample_mapped_data_with_updated.write_parquet(parquet_path)
+    return parquet_path
+
+
+@pytest.fixture(scope="session")
 def sample_codice_url():
     """Sample codice URL for testing"""
     return "https://contrataciondelestado.es/codice/cl/"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_codice_html():
     """Sample HTML content for codice website"""
     return """
@@ -488,7 +486,7 @@ def sample_codice_html():
     """
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_version_html():
     """Sample HTML content for codice version page"""
     return """
@@ -503,7 +501,7 @@ def sample_version_html():
     """
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_codice_xml():
     """Sample codice XML content"""
     return """
@@ -534,7 +532,7 @@ def sample_codice_xml():
     """
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_parquet_files_data():
     """Sample data for creating parquet files"""
     return pl.DataFrame(
@@ -568,7 +566,7 @@ def sample_codice_data():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_edge_case_data():
     """Sample data with CPV code edge cases for testing"""
     return pl.DataFrame(
@@ -592,3 +590,71 @@ def sample_edge_case_data():
             "ProjectSubTypeCode": ["001", "001", "001", "001", "001"],
         }
     )
+
+
+@pytest.fixture(scope="session")
+def sample_open_tenders_atom():
+    """Sample ATOM feed with an open (PUB) and an awarded (ADJ) tender"""
+    return """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"
+    xmlns:cac="urn:dgpe:names:draft:codice:schema:xsd:CommonAggregateComponents-2"
+    xmlns:cbc="urn:dgpe:names:draft:codice:schema:xsd:CommonBasicComponents-2"
+    xmlns:cac-place-ext="urn:dgpe:names:draft:codice-place-ext:schema:xsd:CommonAggregateComponents-2"
+    xmlns:cbc-place-ext="urn:dgpe:names:draft:codice-place-ext:schema:xsd:CommonBasicComponents-2">
+    <title>Open tenders</title>
+    <entry>
+        <id>https://example.com/id/1</id>
+        <link href="http://example.com/tender1"/>
+        <summary type="text">Summary 1</summary>
+        <title>Test Tender 1</title>
+        <updated>2023-01-01T00:00:00Z</updated>
+        <cac-place-ext:ContractFolderStatus>
+            <cbc:ContractFolderID>123</cbc:ContractFolderID>
+            <cbc-place-ext:ContractFolderStatusCode>PUB</cbc-place-ext:ContractFolderStatusCode>
+            <cac-place-ext:LocatedContractingParty>
+                <cac:Party>
+                    <cac:PartyName><cbc:Name>Test Party 1</cbc:Name></cac:PartyName>
+                    <cac:PostalAddress>
+                        <cbc:CityName>Madrid</cbc:CityName>
+                        <cbc:PostalZone>28001</cbc:PostalZone>
+                        <cac:Country><cbc:Name>Spain</cbc:Name></cac:Country>
+                    </cac:PostalAddress>
+                </cac:Party>
+            </cac-place-ext:LocatedContractingParty>
+            <cac:ProcurementProject>
+                <cbc:TypeCode>1</cbc:TypeCode>
+                <cbc:SubTypeCode>001</cbc:SubTypeCode>
+                <cac:BudgetAmount>
+                    <cbc:EstimatedOverallContractAmount>100000</cbc:EstimatedOverallContractAmount>
+                </cac:BudgetAmount>
+                <cac:RequiredCommodityClassification>
+                    <cbc:ItemClassificationCode>30000000</cbc:ItemClassificationCode>
+                </cac:RequiredCommodityClassification>
+                <cac:RequiredCommodityClassification>
+                    <cbc:ItemClassificationCode>72000000</cbc:ItemClassificationCode>
+                </cac:RequiredCommodityClassification>
+            </cac:ProcurementProject>
+            <cac:TenderingProcess>
+                <cbc:ProcedureCode>OBJ</cbc:ProcedureCode>
+                <cac:TenderSubmissionDeadlinePeriod>
+                    <cbc:EndDate>2099-01-01</cbc:EndDate>
+                </cac:TenderSubmissionDeadlinePeriod>
+            </cac:TenderingProcess>
+        </cac-place-ext:ContractFolderStatus>
+    </entry>
+    <entry>
+        <id>https://example.com/id/2</id>
+        <link href="http://example.com/tender2"/>
+        <summary type="text">Summary 2</summary>
+        <title>Test Tender 2</title>
+        <updated>2023-01-02T00:00:00Z</updated>
+        <cac-place-ext:ContractFolderStatus>
+            <cbc:ContractFolderID>456</cbc:ContractFolderID>
+            <cbc-place-ext:ContractFolderStatusCode>ADJ</cbc-place-ext:ContractFolderStatusCode>
+            <cac:ProcurementProject>
+                <cbc:TypeCode>2</cbc:TypeCode>
+            </cac:ProcurementProject>
+        </cac-place-ext:ContractFolderStatus>
+    </entry>
+</feed>
+"""
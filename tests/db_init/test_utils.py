@@ -4,58 +4,43 @@ from src.db_init.utils import (
     get_db_codice_tables,
     create_duckdb_db,
 )
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 import polars as pl
+import duckdb
 import os
+import shutil
 
+# 'updated' as parsed by remove_duplicates (RFC3339/ISO8601 format)
+_PARSE_UPDATED = pl.col("updated").str.strptime(
+    pl.Datetime, format="%Y-%m-%dT%H:%M:%S%.fZ", strict=False
+)
 
-def test_get_parquet_base_table(tmp_path, sample_df_with_duplicates):
-    df1 = sample_df_with_duplicates
-    df2 = sample_df_with_duplicates
-
-    # Create sample parquet files
-    df1.write_parquet(f"{tmp_path}/file1.parquet")
-    df2.write_parquet(f"{tmp_path}/file2.parquet")
 
-    with patch("src.common.utils.get_full_paths") as mock_get_full_paths:
-        mock_get_full_paths.return_value = [
-            f"{tmp_path}/file1.parquet",
-            f"{tmp_path}/file2.parquet",
-        ]
+def test_get_parquet_base_table(tmp_path, parquet_pair_dir, sample_df_with_duplicates):
+    df1 = sample_df_with_duplicates
 
-    output_file = get_parquet_base_table(parquet_path=tmp_path, local_db_path=tmp_path)
+    output_file = get_parquet_base_table(
+        parquet_path=parquet_pair_dir, local_db_path=tmp_path
+    )
 
     # Verify the concatenated file
     result_df = pl.read_parquet(output_file)
     expected_df = df1.slice(1, 1)
-    expected_df = expected_df.with_columns(
-        pl.col("updated").str.strptime(
-                pl.Datetime,
-                format="%Y-%m-%dT%H:%M:%S%.fZ",  # RFC3339/ISO8601 format
-                strict=False
-            )
-    )
+    expected_df = expected_df.with_columns(_PARSE_UPDATED)
     assert len(result_df) == len(expected_df)
     assert list(result_df.columns) == list(expected_df.columns)
     assert result_df.equals(expected_df)
 
 
-def test_create_db_local_folder(tmp_path):
+def test_create_db_local_folder(tmp_path, monkeypatch):
     """Test create_db_local_folder function"""
-    # Test creating a new folder
+    # The folder is created under a relative "data" folder
+    monkeypatch.chdir(tmp_path)
     test_folder = "test_local_db"
-    folder_path = os.path.join(tmp_path, "data", test_folder)
-
-    with patch("os.path.join") as mock_join, patch(
-        "os.path.exists"
-    ) as mock_exists, patch("os.makedirs") as mock_makedirs:
-
-        mock_join.return_value = folder_path
-        mock_exists.return_value = False
 
-        create_db_local_folder(test_folder)
+    create_db_local_folder(test_folder)
 
-        mock_makedirs.assert_called_once_with(folder_path)
+    assert (tmp_path / "data" / test_folder).is_dir()
 
 
 def test_get_db_codice_tables(sample_codice_data, tmp_path):
@@ -95,47 +80,23 @@ def test_get_db_codice_tables(sample_codice_data, tmp_path):
             ]
 
 
-def test_create_duckdb_db(tmp_path, sample_parquet_files_data):
+def test_create_duckdb_db(tmp_path, monkeypatch, local_db_template):
     """Test create_duckdb_db function"""
-    # Create sample parquet files in local_db directory
-    local_db_path = os.path.join(tmp_path, "data", "local_db")
-    os.makedirs(local_db_path, exist_ok=True)
-
-    # Create sample parquet files
-    sample_parquet_files_data.write_parquet(
-        os.path.join(local_db_path, "base_table.parquet")
-    )
-    sample_parquet_files_data.write_parquet(
-        os.path.join(local_db_path, "ContractCode.parquet")
-    )
-
-    with patch("glob.glob") as mock_glob, patch(
-        "duckdb.connect"
-    ) as mock_connect, patch("os.path.exists") as mock_exists, patch(
-        "os.remove"
-    ) as mock_remove:
-
-        # Mock glob to return our parquet files
-        mock_glob.return_value = [
-            os.path.join(local_db_path, "base_table.parquet"),
-            os.path.join(local_db_path, "ContractCode.parquet"),
-        ]
-
-        # Mock database existence
-        mock_exists.return_value = True
-
-        # Mock duckdb connection
-        mock_con = MagicMock()
-        mock_connect.return_value = mock_con
+    # Copy the sample parquet files into the relative local_db directory
+    monkeypatch.chdir(tmp_path)
+    local_db_path = tmp_path / "data" / "local_db"
+    shutil.copytree(local_db_template, local_db_path)
 
-        create_duckdb_db("test_db")
+    # An existing database is replaced
+    db_path = tmp_path / "data" / "test_db.duckdb"
+    db_path.write_text("")
 
-        # Verify database was created
-        mock_connect.assert_called_once()
-        mock_remove.assert_called_once()  # Should remove existing database
+    create_duckdb_db("test_db")
 
-        # Verify tables were created for each parquet file
-        assert mock_con.execute.call_count == 2
+    # Verify a table was created for each parquet file
+    with duckdb.connect(str(db_path), read_only=True) as con:
+        tables = {row[0] for row in con.execute("SHOW TABLES").fetchall()}
+        n_rows = con.execute("SELECT count(*) FROM base_table").fetchone()[0]
 
-        # Verify connection was closed
-        mock_con.close.assert_called_once()
+    assert tables == {"base_table", "ContractCode"}
+    assert n_rows == 3
@@ -1,14 +1,16 @@
 from src.dl_parser.utils import (
-    get_soup,
     extract_digits_from_url,
     flatten_dict,
     get_source_data,
     recursive_field_dict,
-    get_atom_data,
+    local_name,
+    iter_atom_entries,
     get_data_list,
     download_and_extract_zip,
+    download_and_extract_many,
     get_folder_path,
     get_full_paths,
+    get_max_workers,
     get_concat_df,
     get_full_parquet,
     remove_duplicates,
@@ -16,16 +18,22 @@ from src.dl_parser.utils import (
     delete_files,
     dl_parser,
 )
+from src.common.utils import get_soup
 import lxml.etree as ET
-from unittest.mock import patch, mock_open, ANY
+from unittest.mock import patch, ANY, MagicMock
 from bs4 import BeautifulSoup
 import polars as pl
+import pyarrow.parquet as pq
+import io
 import os
+import zipfile
+import pytest
+import requests
 
 
 def test_get_soup(sample_url, sample_html_content):
-    with patch("requests.get") as mock_get:
-        mock_get.return_value.text = sample_html_content
+    with patch("src.common.utils.session.get") as mock_get:
+        mock_get.return_value.content = sample_html_content.encode()
         soup = get_soup(sample_url)
         assert isinstance(soup, BeautifulSoup)
 
@@ -46,10 +54,19 @@ def test_flatten_dict(sample_nested_dict):
     assert flat_dict == expected_dict
 
 
+def test_flatten_dict_same_single_key_list():
+    nested_dict = {"a": [{"b": "1"}, {"b": None}, {"b": "2"}], "c": [{"d": None}]}
+    flat_dict = flatten_dict(nested_dict)
+    assert flat_dict == {"a.b": "1_2"}
+
+
 def test_get_source_data(sample_url, sample_html_content):
-    with patch("requests.get") as mock_get:
-        mock_get.return_value.text = sample_html_content
+    with patch("src.common.utils.session.get") as mock_get:
+        mock_get.return_value.content = sample_html_content.encode()
+        get_source_data.cache_clear()
         source_data = get_source_data(sample_url)
+        assert get_source_data(sample_url) is source_data
+        mock_get.assert_called_once()
         expected_data = {
             "202502": ("https://contrataciondelsectorpublico.gob.es/3_202502.zip"),
             "2020": ("https://contrataciondelsectorpublico.gob.es/3_2020.zip"),
@@ -73,20 +90,21 @@ def test_recursive_field_dict():
     assert field_dict == expected_dict
 
 
-def test_get_atom_data(sample_atom_content):
-    root = ET.fromstring(sample_atom_content)
-    with patch("lxml.etree.parse") as mock_parse, patch(
-        "builtins.open", mock_open(read_data=sample_atom_content)
-    ):
-        mock_parse.return_value = type("obj", (object,), {"getroot": lambda: root})
-        entries, ns = get_atom_data("dummy_path.xml")
+def test_local_name():
+    assert local_name("{http://www.w3.org/2005/Atom}entry") == "entry"
+    assert local_name("{http://www.w3.org/2005/Atom}entry") == "entry"
+    assert local_name("entry") == "entry"
 
-        assert len(entries) == 1
-        assert (
-            entries[0].find("{http://www.w3.org/2005/Atom}title").text
-            == "Example Entry"
-        )
-        assert ns[""] == "http://www.w3.org/2005/Atom"
+
+def test_iter_atom_entries_from_zip(sample_atom_content, tmp_path):
+    zip_path = tmp_path / "sample.zip"
+    with zipfile.ZipFile(zip_path, "w") as z:
+        z.writestr("sample.atom", sample_atom_content)
+
+    with zipfile.ZipFile(zip_path) as z, z.open("sample.atom") as f:
+        titles = [entry[0].text for entry in iter_atom_entries(f)]
+
+    assert titles == ["Example Entry"]
 
 
 def test_get_data_list(sample_entries, sample_data_list):
@@ -97,14 +115,93 @@ def test_get_data_list(sample_entries, sample_data_list):
 
 
 def test_download_and_extract_zip(sample_source_data, sample_period, tmp_path):
-    with patch("requests.get") as mock_get, patch("zipfile.ZipFile") as mock_zip, patch(
-        "builtins.open", mock_open()
-    ):
-        mock_get.return_value.content = b"dummy zip content"
-        mock_zip.return_value.infolist.return_value = []
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as z:
+        z.writestr("file1.atom", "<feed/>")
+        z.writestr("file2.atom", "<feed/>")
+
+    # Only the HTTP request is mocked, the zip goes through the real temporary file
+    with patch("src.common.utils.session.get") as mock_get:
+        response = mock_get.return_value.__enter__.return_value
+        response.status_code = 200
+        response.headers = {"ETag": '"abc"'}
+        response.iter_content.return_value = [buffer.getvalue()]
+        download_and_extract_zip(sample_source_data, sample_period, tmp_path)
+        mock_get.assert_called_with(
+            "https://example.com/contratacion202101.zip", stream=True, headers={}
+        )
+
+    folder = tmp_path / sample_period
+    assert sorted(os.listdir(folder)) == [".etag", "file1.atom", "file2.atom"]
+    assert (folder / "file1.atom").read_text() == "<feed/>"
+    assert (folder / ".etag").read_text() == '"abc"'
+
+
+def test_download_and_extract_zip_not_modified(
+    sample_source_data, sample_period, tmp_path
+):
+    (tmp_path / sample_period).mkdir()
+    (tmp_path / sample_period / ".etag").write_text('"abc"')
+    with patch("src.common.utils.session.get") as mock_get, patch(
+        "zipfile.ZipFile"
+    ) as mock_zip:
+        mock_get.return_value.__enter__.return_value.status_code = 304
         download_and_extract_zip(sample_source_data, sample_period, tmp_path)
-        mock_get.assert_called_with("https://example.com/contratacion202101.zip")
-        mock_zip.assert_called_with(ANY)
+        mock_get.assert_called_with(
+            "https://example.com/contratacion202101.zip",
+            stream=True,
+            headers={"If-None-Match": '"abc"'},
+        )
+        mock_zip.assert_not_called()
+
+
+def test_download_and_extract_zip_nested(sample_source_data, sample_period, tmp_path):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as z:
+        z.writestr("nested/", "")
+        for i in range(4):
+            z.writestr(f"nested/deeper/file{i}.atom", "<feed/>")
+
+    with patch("src.common.utils.session.get") as mock_get:
+        response = mock_get.return_value.__enter__.return_value
+        response.status_code = 200
+        response.headers = {}
+        response.iter_content.return_value = [buffer.getvalue()]
+        download_and_extract_zip(sample_source_data, sample_period, tmp_path)
+
+    extracted = sorted(os.listdir(tmp_path / sample_period / "nested" / "deeper"))
+    assert extracted == [f"file{i}.atom" for i in range(4)]
+
+
+def test_download_and_extract_many(tmp_path):
+    source_data = {
+        "202101": "https://example.com/contratacion202101.zip",
+        "202102": "https://example.com/contratacion202102.zip",
+    }
+
+    def fake_get(url, **kwargs):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as z:
+            z.writestr(f"{url[-10:-4]}.atom", "<feed/>")
+        response = MagicMock(status_code=200, headers={})
+        response.__enter__.return_value = response
+        response.iter_content.return_value = [buffer.getvalue()]
+        return response
+
+    with patch("src.common.utils.session.get", side_effect=fake_get):
+        download_and_extract_many(source_data, ["202101", "202102"], tmp_path)
+
+    assert os.listdir(tmp_path / "202101") == ["202101.atom"]
+    assert os.listdir(tmp_path / "202102") == ["202102.atom"]
+
+
+def test_download_and_extract_many_error(sample_source_data, tmp_path):
+    with patch("src.common.utils.session.get") as mock_get:
+        response = mock_get.return_value.__enter__.return_value
+        response.status_code = 500
+        response.raise_for_status.side_effect = requests.HTTPError("500")
+        with pytest.raises(requests.HTTPError):
+            download_and_extract_many(sample_source_data, ["202101"], tmp_path)
 
 
 def test_get_folder_path(sample_period, tmp_path):
@@ -115,29 +212,38 @@ def test_get_folder_path(sample_period, tmp_path):
         assert folder_path == expected_path
 
 
-def test_get_full_paths(sample_folder):
-    sample_files = ["file1.xml", "file2.xml"]
-    with patch("os.listdir") as mock_listdir:
-        mock_listdir.return_value = sample_files
-        full_paths = get_full_paths(sample_folder)
-        expected_paths = [os.path.join(sample_folder, file) for file in sample_files]
-        assert full_paths == expected_paths
+def test_get_full_paths(tmp_path):
+    sample_files = ["file2.xml", "file1.xml", ".hidden"]
+    for file in sample_files:
+        (tmp_path / file).touch()
+    (tmp_path / "subfolder").mkdir()
+
+    full_paths = get_full_paths(str(tmp_path))
+    expected_paths = [os.path.join(tmp_path, f) for f in ["file1.xml", "file2.xml"]]
+    assert full_paths == expected_paths
 
 
-def test_get_concat_df(sample_data_list, sample_df, tmp_path):
-    sample_paths = ["data/raw/atom/202101/file1.xml", "data/raw/atom/202101/file2.xml"]
-    with patch("src.dl_parser.utils.get_atom_data") as mock_get_atom_data, patch(
-        "src.dl_parser.utils.get_data_list"
-    ) as mock_get_data_list:
-        mock_get_atom_data.return_value = ([], {})
-        mock_get_data_list.return_value = sample_data_list
+def test_get_max_workers(monkeypatch):
+    monkeypatch.setenv("SPPD_WORKERS", "3")
+    assert get_max_workers() == 3
 
-        df = get_concat_df(sample_paths, tmp_path)
-        expected_df = pl.concat([sample_df, sample_df], how="diagonal")
+    monkeypatch.delenv("SPPD_WORKERS")
+    assert get_max_workers() >= 1
 
-        assert len(df) == len(expected_df)
-        assert list(df.columns) == list(expected_df.columns)
-        assert df.equals(expected_df)
+
+def test_get_concat_df(sample_atom_feed, sample_df, tmp_path):
+    sample_paths = []
+    for name in ["file1.atom", "file2.atom"]:
+        path = tmp_path / name
+        path.write_text(sample_atom_feed)
+        sample_paths.append(str(path))
+
+    df = get_concat_df(sample_paths, tmp_path)
+    expected_df = pl.concat([sample_df, sample_df], how="diagonal")
+
+    assert len(df) == len(expected_df)
+    assert list(df.columns) == list(expected_df.columns)
+    assert df.equals(expected_df)
 
 
 def test_get_full_parquet(sample_period, sample_df, tmp_path):
@@ -159,6 +265,9 @@ def test_get_full_parquet(sample_period, sample_df, tmp_path):
         expected_parquet_file = f"{tmp_path}/parquet/202101.parquet"
 
         assert parquet_file == expected_parquet_file
+        assert pl.read_parquet(parquet_file).equals(sample_df)
+        metadata = pq.ParquetFile(parquet_file).metadata
+        assert metadata.row_group(0).column(0).compression == "ZSTD"
 
 
 def test_remove_duplicates(sample_df_with_duplicates):
@@ -183,21 +292,42 @@ def test_remove_duplicates(sample_df_with_duplicates):
     assert no_dups_df.equals(expected_df)
 
 
+def test_remove_duplicates_keeps_dated_row():
+    df = pl.DataFrame(
+        {
+            "link": ["a", "a", "b"],
+            "updated": [None, "2023-01-01T00:00:00Z", None],
+            "title": ["old", "new", "only"],
+        }
+    )
+    no_dups_df = remove_duplicates(df=df, strategy="link").sort("link")
+
+    assert no_dups_df["title"].to_list() == ["new", "only"]
+
+
 def test_delete_files(sample_period, tmp_path):
-    with patch("os.path.exists") as mock_exists, patch(
-        "os.listdir"
-    ) as mock_listdir, patch("os.rmdir") as mock_rmdir:
-        mock_exists.return_value = True
-        mock_listdir.return_value = ["file1.xml", "file2.xml"]
+    folder = tmp_path / sample_period
+    (folder / "nested").mkdir(parents=True)
+    for name in ("file1.xml", "file2.xml", "nested/file3.xml"):
+        (folder / name).write_text("<feed/>")
+
+    delete_files(sample_period, tmp_path)
+
+    assert not folder.exists()
+
+
+def test_delete_files_missing_period(sample_period, tmp_path):
+    with pytest.raises(FileNotFoundError):
         delete_files(sample_period, tmp_path)
-        mock_rmdir.assert_called_with(f"{tmp_path}/{sample_period}")
+
+    assert not (tmp_path / sample_period).exists()
 
 
 def test_dl_parser(sample_source_data, sample_period, sample_parquet_path):
 
     with patch(
-        "src.dl_parser.utils.download_and_extract_zip"
-    ) as mock_download_and_extract_zip, patch(
+        "src.dl_parser.utils.download_and_extract_many"
+    ) as mock_download_and_extract_many, patch(
         "src.dl_parser.utils.get_full_parquet"
     ) as mock_get_full_parquet, patch(
         "src.dl_parser.utils.delete_files"
@@ -212,11 +342,11 @@ def test_dl_parser(sample_source_data, sample_period, sample_parquet_path):
             del_files="Y",
         )
 
-        mock_download_and_extract_zip.assert_called_once_with(
-            sample_source_data, sample_period
+        mock_download_and_extract_many.assert_called_once_with(
+            sample_source_data, [sample_period]
         )
         mock_get_full_parquet.assert_called_once_with(
-            period=sample_period, dup_strategy="None", apply_mapping="N"
+            period=sample_period, dup_strategy="None", apply_mapping="N", tmp_dir=ANY
         )
         mock_delete_files.assert_called_once_with(sample_period)
         assert result == [sample_parquet_path]
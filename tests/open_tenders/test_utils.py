@@ -1,80 +1,53 @@
 import pytest
-from unittest.mock import patch
-from pathlib import Path
 import json
+import os
+import re
+import polars as pl
 
 from src.open_tenders.utils import (
     map_codes,
     save_mapped_data_to_json,
     open_tenders_cols,
+    process_single_file,
+    get_parquet_open_tenders,
+    iter_atom_paths,
+    get_open_tender_record,
+    get_recent_months,
 )
+from src.dl_parser.utils import iter_atom_entries
 
 
-def test_simple_code_mapping(
-    tmp_path, sample_mapping_tables, sample_raw_data_for_mapping
-):
-    """Test simple code-to-name mapping"""
-    data_path = str(tmp_path)
-
-    # Use fixture for raw data
-    sample_raw_data_for_mapping.write_parquet(f"{data_path}/open_tenders_raw.parquet")
-
-    # Create sample mapping files using the fixture
-    for filename, df in sample_mapping_tables.items():
-        df.write_parquet(f"{data_path}/{filename}.parquet")
-
-    with patch("builtins.print") as mock_print:
-        result = map_codes(data_path, "open_tenders_raw", "open_tenders")
-
-        # Check that mapping was applied correctly
-        assert "Automatically evaluated" in result["ProcessCode"].to_list()
-        assert "Not automatically evaluated" in result["ProcessCode"].to_list()
-        assert "Goods" in result["ProjectTypeCode"].to_list()
-        assert "Services" in result["ProjectTypeCode"].to_list()
-
-        # Check CPV code mapping - now returns lists
-        cpv_codes = result["CPVCode"].to_list()
-        assert len(cpv_codes) == 2
-
-        # First row: single CPV code "30000000" -> ["Office and computing machinery"]
-        assert cpv_codes[0] == ["Office and computing machinery"]
-
-        # Second row: multiple CPV codes "72000000_30000000" -> ["IT services", "Office and computing machinery"]
-        assert cpv_codes[1] == ["IT services", "Office and computing machinery"]
-
-        # Note: The current code has a bug where subtype mapping doesn't work
-        # because it uses mapped ProjectTypeCode values to look up in a dictionary
-        # that has original values as keys. So we expect the original codes to remain.
-        project_subtype_values = result["ProjectSubTypeCode"].to_list()
-        assert "001" in project_subtype_values
-        assert "002" in project_subtype_values
-
-        # Check output file was created
-        output_file = Path(f"{data_path}/open_tenders.parquet")
-        assert output_file.exists()
-        mock_print.assert_called_with(f"Mapped data saved to {output_file}")
+def _check_simple_mapping(result):
+    """Known codes are replaced by their names"""
+    # Check that mapping was applied correctly, row by row
+    assert result.select("ProcessCode", "ProjectTypeCode").rows() == [
+        ("Automatically evaluated", "Goods"),
+        ("Not automatically evaluated", "Services"),
+    ]
 
+    # Check CPV code mapping - now returns lists
+    cpv_codes = result["CPVCode"].to_list()
+    assert len(cpv_codes) == 2
 
-def test_code_mapping_with_unknown_codes(
-    tmp_path, sample_mapping_tables, sample_raw_data_with_unknown_codes
-):
-    """Test code mapping with unknown codes (should keep original codes)"""
-    data_path = str(tmp_path)
+    # First row: single CPV code "30000000" -> ["Office and computing machinery"]
+    assert cpv_codes[0] == ["Office and computing machinery"]
 
-    # Use fixture for raw data with unknown codes
-    sample_raw_data_with_unknown_codes.write_parquet(
-        f"{data_path}/open_tenders_raw.parquet"
-    )
+    # Second row: multiple CPV codes "72000000_30000000" -> ["IT services", "Office and computing machinery"]
+    assert cpv_codes[1] == ["IT services", "Office and computing machinery"]
 
-    # Create sample mapping files
-    for filename, df in sample_mapping_tables.items():
-        df.write_parquet(f"{data_path}/{filename}.parquet")
+    # Note: The current code has a bug where subtype mapping doesn't work
+    # because it uses mapped ProjectTypeCode values to look up in a dictionary
+    # that has original values as keys. So we expect the original codes to remain.
+    assert result["ProjectSubTypeCode"].to_list() == ["001", "002"]
 
-    result = map_codes(data_path, "open_tenders_raw", "open_tenders")
 
+def _check_unknown_codes(result):
+    """Unknown codes keep their original value"""
     # Known codes should be mapped
-    assert "Automatically evaluated" in result["ProcessCode"].to_list()
-    assert "Goods" in result["ProjectTypeCode"].to_list()
+    process_codes = set(result["ProcessCode"])
+    project_types = set(result["ProjectTypeCode"])
+    assert "Automatically evaluated" in process_codes
+    assert "Goods" in project_types
 
     # Check CPV code mapping with unknown codes
     cpv_codes = result["CPVCode"].to_list()
@@ -87,61 +60,124 @@ def test_code_mapping_with_unknown_codes(
     assert cpv_codes[1] == ["99999999", "Office and computing machinery"]
 
     # Unknown codes should remain unchanged
-    assert "UNKNOWN" in result["ProcessCode"].to_list()
-    assert "UnknownType" in result["ProjectTypeCode"].to_list()
-    assert "999" in result["ProjectSubTypeCode"].to_list()
+    assert "UNKNOWN" in process_codes
+    assert "UnknownType" in project_types
+    assert "999" in set(result["ProjectSubTypeCode"])
+
+
+# Mapped CPV codes expected for each row of sample_edge_case_data
+_EXPECTED_CPV_EDGE_CASES = [
+    # Empty string should return empty list
+    [],
+    # Single known code should return list with one item
+    ["Office and computing machinery"],
+    # Code ending with underscore should ignore empty part
+    ["Office and computing machinery"],
+    # Code starting with underscore should ignore empty part
+    ["Office and computing machinery"],
+    # Multiple underscores should be handled correctly
+    ["Office and computing machinery", "IT services"],
+]
+
+
+def _check_cpv_edge_cases(result):
+    """Empty parts of the CPV codes are dropped"""
+    assert result["CPVCode"].to_list() == _EXPECTED_CPV_EDGE_CASES
+
+
+@pytest.mark.parametrize(
+    "raw_fixture, check",
+    [
+        pytest.param("sample_raw_data_for_mapping", _check_simple_mapping, id="simple"),
+        pytest.param(
+            "sample_raw_data_with_unknown_codes", _check_unknown_codes, id="unknown"
+        ),
+        pytest.param("sample_edge_case_data", _check_cpv_edge_cases, id="cpv_edge"),
+    ],
+)
+def test_map_codes(request, capsys, mapping_tables_dir, raw_fixture, check):
+    """Test code-to-name mapping on each sample of raw data"""
+    data_path = str(mapping_tables_dir)
+    raw_file = mapping_tables_dir / "open_tenders_raw.parquet"
+    output_file = mapping_tables_dir / "open_tenders.parquet"
+
+    # Only the raw data changes between cases, the mapping tables are shared
+    raw_data = request.getfixturevalue(raw_fixture)
+    raw_data.write_parquet(raw_file)
+
+    result = map_codes(data_path, "open_tenders_raw", "open_tenders")
+
+    check(result)
+
+    # Check output file was created
+    assert output_file.exists()
+    assert capsys.readouterr().out.endswith(f"Mapped data saved to {output_file}\n")
+
+
+def _expected_metadata(parquet_path):
+    """Aggregate the metadata values straight from the parquet file with a lazy scan"""
+    stats = (
+        pl.scan_parquet(parquet_path)
+        .select(
+            pl.len().alias("total_records"),
+            pl.col("updated").max().alias("most_recent_update"),
+            pl.col("updated").min().alias("earliest_update"),
+            pl.col("EstimatedAmount").sum().alias("total_estimated_amount"),
+        )
+        .collect()
+        .row(0, named=True)
+    )
+    stats["most_recent_update"] = stats["most_recent_update"].isoformat()
+    stats["earliest_update"] = stats["earliest_update"].isoformat()
+    return stats
 
 
-def test_json_conversion(tmp_path, sample_mapped_data_with_updated):
+def test_json_conversion(tmp_path, capsys, mapped_parquet_path):
     """Test JSON conversion with current implementation"""
     data_path = str(tmp_path)
+    parquet_file = tmp_path / "open_tenders.parquet"
+    output_file = tmp_path / "open_tenders.json"
 
-    # Use fixture for mapped data with updated field
-    sample_mapped_data_with_updated.write_parquet(f"{data_path}/open_tenders.parquet")
-
-    with patch("builtins.print") as mock_print:
-        result = save_mapped_data_to_json(data_path, "open_tenders")
-
-        # Check output file was created
-        output_file = Path(f"{data_path}/open_tenders.json")
-        assert output_file.exists()
-        assert result == str(output_file)
-
-        # Check JSON content
-        with open(output_file, "r", encoding="utf-8") as f:
-            json_data = json.load(f)
-
-        assert "metadata" in json_data
-        assert "data" in json_data
-        assert json_data["metadata"]["total_records"] == 2
-        assert len(json_data["data"]) == 2
-        assert json_data["data"][0]["ID"] == "123"
-        assert json_data["data"][1]["ID"] == "456"
-
-        # Check metadata structure matches current implementation
-        metadata = json_data["metadata"]
-        assert "total_records" in metadata
-        assert "schema" in metadata
-        assert "created_at" in metadata
-        assert "most_recent_update" in metadata
-        assert "earliest_update" in metadata
-        assert "total_estimated_amount" in metadata
-
-        # Check that datetime was converted to timestamp
-        assert isinstance(metadata["created_at"], int)
-
-        # Check that most_recent_update and earliest_update are properly set
-        assert metadata["most_recent_update"] is not None
-        assert metadata["earliest_update"] is not None
-        assert "2023-01-02" in metadata["most_recent_update"]  # Should be the max date
-        assert "2023-01-01" in metadata["earliest_update"]  # Should be the min date
-
-        # Check that total_estimated_amount is calculated
-        assert metadata["total_estimated_amount"] == 150000  # 50000 + 100000
-
-        mock_print.assert_called_with(
-            f"Mapped data with metadata saved to {output_file}"
-        )
+    # Link the mapped data with updated field, written once per session
+    parquet_file.symlink_to(mapped_parquet_path)
+
+    result = save_mapped_data_to_json(data_path, "open_tenders")
+
+    # Check output file was created
+    assert output_file.exists()
+    assert result == str(output_file)
+
+    # Check JSON content
+    json_data = json.loads(output_file.read_bytes())
+
+    assert json_data.keys() == {"metadata", "data"}
+
+    # Only the record IDs are checked, so drop the data payload right away
+    assert [record["ID"] for record in json_data.pop("data")] == ["123", "456"]
+    metadata = json_data.pop("metadata")
+    assert metadata["total_records"] == 2
+
+    # Check metadata structure matches current implementation
+    assert "total_records" in metadata
+    assert "schema" in metadata
+    assert "created_at" in metadata
+    assert "most_recent_update" in metadata
+    assert "earliest_update" in metadata
+    assert "total_estimated_amount" in metadata
+
+    # Check that datetime was converted to timestamp
+    assert isinstance(metadata["created_at"], int)
+
+    # Check the aggregates against the same ones computed from the parquet file
+    expected = _expected_metadata(parquet_file)
+    assert {key: metadata[key] for key in expected} == expected
+    assert "2023-01-02" in metadata["most_recent_update"]  # Should be the max date
+    assert "2023-01-01" in metadata["earliest_update"]  # Should be the min date
+    assert metadata["total_estimated_amount"] == 150000  # 50000 + 100000
+
+    assert capsys.readouterr().out.endswith(
+        f"Mapped data with metadata saved to {output_file}\n"
+    )
 
 
 def test_json_conversion_without_updated_field(
@@ -151,9 +187,7 @@ def test_json_conversion_without_updated_field(
     data_path = str(tmp_path)
 
     # Use fixture for mapped data without updated field
-    sample_mapped_data_without_updated.write_parquet(
-        f"{data_path}/open_tenders.parquet"
-    )
+    sample_mapped_data_without_updated.write_parquet(tmp_path / "open_tenders.parquet")
 
     # Since the actual function assumes 'updated' column exists, we'll test the error case
     with pytest.raises(Exception):  # Should raise ColumnNotFoundError
@@ -168,63 +202,144 @@ def test_missing_parquet_file_raises_error(tmp_path):
         save_mapped_data_to_json(data_path, "nonexistent")
 
 
+# Source fields the open tenders data can't do without
+_REQUIRED_OPEN_TENDERS_FIELDS = frozenset(
+    {
+        "ContractFolderID",
+        "ContractFolderStatusCode",
+        "LocatedContractingParty.Party.PartyName.Name",
+        "ProcurementProject.TypeCode",
+    }
+)
+
+# A column name starts with a letter and has only letters, digits, underscores or spaces
+_COLUMN_NAME_RE = re.compile(r"[A-Za-z][A-Za-z0-9_ ]*")
+
+
 def test_open_tenders_cols_structure():
     """Test that open_tenders_cols has expected structure"""
     assert isinstance(open_tenders_cols, dict)
     assert len(open_tenders_cols) > 0
 
-    # Check that all values are strings
-    for key, value in open_tenders_cols.items():
-        assert isinstance(key, str)
-        assert isinstance(value, str)
+    # Check that all keys and values are strings
+    assert all(isinstance(item, str) for item in open_tenders_cols.keys())
+    assert all(isinstance(item, str) for item in open_tenders_cols.values())
 
     # Check for required mappings
-    required_mappings = [
-        "ContractFolderID",
-        "ContractFolderStatusCode",
-        "LocatedContractingParty.Party.PartyName.Name",
-        "ProcurementProject.TypeCode",
-    ]
-    for mapping in required_mappings:
-        assert mapping in open_tenders_cols
+    assert _REQUIRED_OPEN_TENDERS_FIELDS <= open_tenders_cols.keys()
 
 
 def test_open_tenders_cols_mapping_values():
     """Test that mapping values are appropriate column names"""
-    for key, value in open_tenders_cols.items():
-        # Check that mapped values are valid column names
-        assert value.isidentifier() or value.replace(" ", "").isalnum()
-        assert len(value) > 0
-        assert not value.startswith("_")  # Should not start with underscore
-
-
-def test_cpv_code_edge_cases(tmp_path, sample_mapping_tables, sample_edge_case_data):
-    """Test CPV code mapping with edge cases"""
-    data_path = str(tmp_path)
-
-    # Use the fixture for edge case data
-    sample_edge_case_data.write_parquet(f"{data_path}/open_tenders_raw.parquet")
+    invalid = [
+        v for v in open_tenders_cols.values() if not _COLUMN_NAME_RE.fullmatch(v)
+    ]
+    assert invalid == []
+
+
+def test_process_single_file(tmp_path, sample_open_tenders_atom):
+    """Test open tenders extraction from an ATOM file"""
+    atom_file = tmp_path / "sample.atom"
+    atom_file.write_text(sample_open_tenders_atom, encoding="utf-8")
+
+    df = process_single_file(str(atom_file))
+
+    assert df.height == 2
+    data = df.to_dicts()
+
+    # Open tenders get all the columns extracted
+    assert data[0] == {
+        "link": "http://example.com/tender1",
+        "title": "Test Tender 1",
+        "updated": "2023-01-01T00:00:00Z",
+        "ID": "123",
+        "Status": "PUB",
+        "ContractingParty": "Test Party 1",
+        "City": "Madrid",
+        "Country": "Spain",
+        "PostalZone": "28001",
+        "ProjectTypeCode": "1",
+        "ProjectSubTypeCode": "001",
+        "CPVCode": "30000000_72000000",
+        "EstimatedAmount": 100000.0,
+        "ProcessCode": "OBJ",
+        "ProcessEndDate": "2099-01-01",
+    }
+
+    # Other tenders only keep what is needed to remove duplicates
+    assert {k: v for k, v in data[1].items() if v is not None} == {
+        "link": "http://example.com/tender2",
+        "title": "Test Tender 2",
+        "updated": "2023-01-02T00:00:00Z",
+        "Status": "ADJ",
+    }
+
+
+def test_process_single_file_invalid_file(tmp_path):
+    """Test that an unparsable file gives None"""
+    atom_file = tmp_path / "invalid.atom"
+    atom_file.write_text("not xml", encoding="utf-8")
+
+    assert process_single_file(str(atom_file)) is None
+
+
+def test_get_open_tender_record_expired(tmp_path, sample_open_tenders_atom):
+    """Test that an open tender past its deadline only keeps the minimal record"""
+    atom_file = tmp_path / "sample.atom"
+    atom_file.write_text(sample_open_tenders_atom, encoding="utf-8")
+
+    entry = next(iter_atom_entries(str(atom_file)))
+    record = get_open_tender_record(entry, today="2100-01-01")
+
+    assert record == {
+        "link": "http://example.com/tender1",
+        "title": "Test Tender 1",
+        "updated": "2023-01-01T00:00:00Z",
+        "Status": "PUB",
+    }
+
+
+def test_iter_atom_paths(tmp_path):
+    """Test that ATOM files are found in nested folders"""
+    (tmp_path / "202401").mkdir()
+    (tmp_path / "202402" / "nested").mkdir(parents=True)
+    (tmp_path / "202401" / "a.atom").write_text("")
+    (tmp_path / "202402" / "nested" / "b.atom").write_text("")
+    (tmp_path / "202402" / "readme.txt").write_text("")
+
+    paths = sorted(iter_atom_paths(str(tmp_path)))
+
+    assert paths == [
+        str(tmp_path / "202401" / "a.atom"),
+        str(tmp_path / "202402" / "nested" / "b.atom"),
+    ]
 
-    # Create sample mapping files
-    for filename, df in sample_mapping_tables.items():
-        df.write_parquet(f"{data_path}/{filename}.parquet")
 
-    result = map_codes(data_path, "open_tenders_raw", "open_tenders")
+def test_get_parquet_open_tenders(tmp_path, sample_open_tenders_atom):
+    """Test that only open tenders end up in the consolidated parquet file"""
+    atom_file = tmp_path / "sample.atom"
+    atom_file.write_text(sample_open_tenders_atom, encoding="utf-8")
+    data_path = str(tmp_path / "open_tenders")
 
-    # Check CPV code mapping for edge cases
-    cpv_codes = result["CPVCode"].to_list()
+    result = get_parquet_open_tenders(iter([str(atom_file)]), data_path, "test")
 
-    # Empty string should return empty list
-    assert cpv_codes[0] == []
+    df = pl.read_parquet(result["parquet_path"])
+    assert result["df_shape"] == df.shape
+    assert df["link"].to_list() == ["http://example.com/tender1"]
+    assert df["EstimatedAmount"].to_list() == [100000.0]
 
-    # Single known code should return list with one item
-    assert cpv_codes[1] == ["Office and computing machinery"]
+    # Only the final parquet file is left behind
+    assert os.listdir(data_path) == ["test.parquet"]
 
-    # Code ending with underscore should ignore empty part
-    assert cpv_codes[2] == ["Office and computing machinery"]
 
-    # Code starting with underscore should ignore empty part
-    assert cpv_codes[3] == ["Office and computing machinery"]
+def test_get_recent_months():
+    """Test that the most recent months are picked across a year boundary"""
+    source_dict = {
+        "2023": "https://example.com/2023.zip",
+        "202411": "https://example.com/202411.zip",
+        "202412": "https://example.com/202412.zip",
+        "202501": "https://example.com/202501.zip",
+        "202502": "https://example.com/202502.zip",
+    }
 
-    # Multiple underscores should be handled correctly
-    assert cpv_codes[4] == ["Office and computing machinery", "IT services"]
+    assert get_recent_months(source_dict) == ["202502", "202501", "202412"]